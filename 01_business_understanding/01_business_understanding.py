@@ -8,6 +8,9 @@ import pandas as pd
 import numpy as np
 import janitor as jn
 from itertools import product
+from functools import lru_cache
+import os
+from concurrent.futures import ProcessPoolExecutor
 import plotly.express as px
 from mizani.formatters import custom_format
 from plotnine import *
@@ -181,6 +184,75 @@ def cost_total_unsub_cost(cost_table):
 
 cost_total_unsub_cost(cost_table_df)
 
+
+# Function: Closed-Form Cost Totals (Memoized) ----
+# - No growth: the same cost every period -> cost x n_periods
+# - With growth: geometric series -> cost x ((1 + g) ** n_periods - 1) / g  (cost x n_periods when g = 0)
+# - No cost table built; results cached per parameter tuple (slider re-renders are free)
+@lru_cache(maxsize=4096)
+def _cost_closed_form_totals(
+    email_list_size, email_list_growth_rate, sales_emails_per_month,
+    unsub_rate_per_sales_email, customer_conversion_rate, average_customer_value, n_periods
+):
+
+    cost_per_period = email_list_size * unsub_rate_per_sales_email * sales_emails_per_month \
+        * customer_conversion_rate * average_customer_value
+
+    cost_no_growth = cost_per_period * n_periods
+
+    if email_list_growth_rate == 0:
+        cost_with_growth = cost_no_growth
+    else:
+        cost_with_growth = cost_per_period \
+            * ((1 + email_list_growth_rate) ** n_periods - 1) / email_list_growth_rate
+
+    return float(cost_no_growth), float(cost_with_growth)
+
+
+def cost_total_unsub_cost_analytic(
+    email_list_size            = 100000,
+    email_list_growth_rate     = 0.035,
+    sales_emails_per_month     = 5,
+    unsub_rate_per_sales_email = 0.005,
+    customer_conversion_rate   = 0.05,
+    average_customer_value     = 2000,
+    n_periods                  = 12,
+    per_period                 = False
+):
+
+    # Per-period values on request (one closed form per period, no intermediate columns)
+    if per_period:
+        period = np.arange(0, int(n_periods))
+
+        cost_per_period = email_list_size * unsub_rate_per_sales_email * sales_emails_per_month \
+            * customer_conversion_rate * average_customer_value
+
+        return pd.DataFrame(dict(
+            period           = period,
+            cost_no_growth   = np.repeat(cost_per_period, len(period)),
+            cost_with_growth = cost_per_period * (1 + email_list_growth_rate) ** period
+        ))
+
+    cost_no_growth, cost_with_growth = _cost_closed_form_totals(
+        email_list_size, email_list_growth_rate, sales_emails_per_month,
+        unsub_rate_per_sales_email, customer_conversion_rate, average_customer_value, int(n_periods)
+    )
+
+    # Same shape as cost_total_unsub_cost()
+    summary_df = pd.DataFrame(
+        [[cost_no_growth, cost_with_growth]],
+        columns=["cost_no_growth", "cost_with_growth"]
+    )
+
+    return summary_df
+
+
+cost_total_unsub_cost_analytic()
+
+cost_total_unsub_cost_analytic(per_period=True)
+
+_cost_closed_form_totals.cache_info()
+
 # ARE OBJECTIVES BEING MET?
 # - We can see a large cost due to unsubscription
 # - However, some attributes may vary causing costs to change
@@ -242,15 +314,84 @@ simulation_results_df = pd.concat(summary_list, axis=0) \
     .merge(parameter_grid_df, left_index=True, right_index=True)
 
 
+# Function: Broadcast Cost Tensor (Scenario x Period) ----
+# - Same math as cost_calc_monthly_cost_table, no DataFrame per scenario
+# - Every input is a scalar or a 1D array (one value per scenario)
+# - Periods past a scenario's n_periods are 0, so row sums are the scenario totals
+
+
+def cost_calc_unsub_cost_array(
+    email_list_size            = 100000,
+    email_list_growth_rate     = 0.035,
+    sales_emails_per_month     = 5,
+    unsub_rate_per_sales_email = 0.005,
+    customer_conversion_rate   = 0.05,
+    average_customer_value     = 2000,
+    n_periods                  = 12
+):
+
+    # Scenarios down the rows (S, 1), periods across the columns (1, P)
+    def _col(x):
+        return np.asarray(x).reshape(-1, 1)
+
+    n_periods = _col(n_periods)
+
+    period = np.arange(0, int(n_periods.max()))[np.newaxis, :]
+
+    in_period = period < n_periods
+
+    # No Growth
+    lost_customers_no_growth = _col(email_list_size) * _col(unsub_rate_per_sales_email) \
+        * _col(sales_emails_per_month) * _col(customer_conversion_rate)
+
+    cost_no_growth = lost_customers_no_growth * _col(average_customer_value)
+
+    # With Growth
+    email_size_with_growth = _col(email_list_size) * ((1 + _col(email_list_growth_rate)) ** period)
+
+    lost_customers_with_growth = email_size_with_growth * _col(unsub_rate_per_sales_email) \
+        * _col(sales_emails_per_month) * _col(customer_conversion_rate)
+
+    cost_with_growth = lost_customers_with_growth * _col(average_customer_value)
+
+    cost_no_growth, cost_with_growth, in_period = np.broadcast_arrays(
+        cost_no_growth, cost_with_growth, in_period
+    )
+
+    return dict(
+        cost_no_growth   = np.where(in_period, cost_no_growth, 0.0),
+        cost_with_growth = np.where(in_period, cost_with_growth, 0.0)
+    )
+
+
+cost_calc_unsub_cost_array(
+    email_list_growth_rate   = np.linspace(0, 0.05, num=10),
+    customer_conversion_rate = 0.05
+)["cost_with_growth"].sum(axis=1)
+
+
 # Function -------------------------------------------------------------------------------------
+# - Any keyword given as a list (e.g. unsub_rate_per_sales_email, sales_emails_per_month,
+#   n_periods) becomes another axis of the grid and another column of the results
+# - engine="numpy": whole grid at once (in scenario chunks), engine="pandas": one table per scenario
 
 
 def cost_simulate_unsub_cost(
     email_list_monthly_growth_rate=[0, 0.035],
     customer_conversion_rate=[0.04, 0.05, 0.06],
+    engine="numpy",
+    chunk_size=100000,
     **kwargs
 ):
 
+    if engine == "numpy":
+        return _cost_simulate_unsub_cost_numpy(
+            email_list_monthly_growth_rate=email_list_monthly_growth_rate,
+            customer_conversion_rate=customer_conversion_rate,
+            chunk_size=chunk_size,
+            **kwargs
+        )
+
     # -- Parameter Grid -- #
     data_dict = dict(
         email_list_monthly_growth_rate=email_list_monthly_growth_rate,
@@ -299,8 +440,251 @@ def cost_simulate_unsub_cost(
     return simulation_results_df
 
 
+def _cost_simulate_unsub_cost_numpy(
+    email_list_monthly_growth_rate=[0, 0.035],
+    customer_conversion_rate=[0.04, 0.05, 0.06],
+    chunk_size=100000,
+    **kwargs
+):
+
+    # -- Parameter Grid (same row order as itertools.product) -- #
+    data_dict = dict(
+        email_list_monthly_growth_rate=email_list_monthly_growth_rate,
+        customer_conversion_rate=customer_conversion_rate
+    )
+
+    fixed_dict = dict()
+
+    for key, value in kwargs.items():
+        if np.ndim(value) > 0:
+            data_dict[key] = value
+        else:
+            fixed_dict[key] = value
+
+    grid = np.meshgrid(*[np.asarray(v) for v in data_dict.values()], indexing="ij")
+
+    parameter_grid_df = pd.DataFrame(
+        {key: axis.ravel() for key, axis in zip(data_dict.keys(), grid)}
+    )
+
+    # -- Cost Tensor, Summed Per Scenario (chunked to bound memory) -- #
+    summary_dict = dict(cost_no_growth=[], cost_with_growth=[])
+
+    for start in range(0, len(parameter_grid_df), chunk_size):
+
+        chunk_df = parameter_grid_df.iloc[start:start + chunk_size]
+
+        cost_dict = cost_calc_unsub_cost_array(
+            email_list_growth_rate=chunk_df["email_list_monthly_growth_rate"].to_numpy(),
+            customer_conversion_rate=chunk_df["customer_conversion_rate"].to_numpy(),
+            **{key: chunk_df[key].to_numpy() for key in list(data_dict.keys())[2:]},
+            **fixed_dict
+        )
+
+        for key in summary_dict.keys():
+            summary_dict[key].append(cost_dict[key].sum(axis=1))
+
+    simulation_results_df = pd.DataFrame(
+        {key: np.concatenate(value) for key, value in summary_dict.items()}
+    ) \
+        .merge(parameter_grid_df, left_index=True, right_index=True)
+
+    # -- Return -- #
+    return simulation_results_df
+
+
 cost_simulate_unsub_cost()
 
+cost_simulate_unsub_cost(
+    email_list_monthly_growth_rate=np.linspace(0, 0.05, num=100),
+    customer_conversion_rate=np.linspace(0.04, 0.06, num=100),
+    unsub_rate_per_sales_email=np.linspace(0.001, 0.005, num=10),
+    sales_emails_per_month=[1, 2, 3, 4, 5],
+    n_periods=[12, 24]
+)
+
+
+# SYNTHESIZE OUTCOMES (MONTE CARLO COST SIMULATION) ----------------------------------
+# - Inputs drawn from distributions instead of fixed grid points
+# - Distribution spec: ("<numpy Generator method>", *params), e.g. ("normal", 0.05, 0.005),
+#   ("uniform", 0.001, 0.005), ("triangular", 0, 0.035, 0.05); scalars are held fixed
+# - Draws run in blocks, each block has its own seeded stream (SeedSequence.spawn), so
+#   results are reproducible and don't depend on n_jobs
+# - Blocks are aggregated as they finish (per-period histograms + sums), memory doesn't grow
+#   with n_draws; histogram range is set from the first block, percentiles are interpolated
+#   within n_bins bins
+# - n_jobs > 1 uses worker processes: under spawn (Windows, macOS) the blocks must be
+#   importable, so call it from a module / behind `if __name__ == "__main__":`, not a
+#   line-by-line session like this script
+
+
+def _cost_monte_carlo_draw(rng, spec, size):
+
+    if np.ndim(spec) == 0:
+        return spec
+
+    dist_name, *dist_params = spec
+
+    return getattr(rng, dist_name)(*dist_params, size=size)
+
+
+def _cost_monte_carlo_block(seed_seq, size, distributions, n_periods, hist_range, n_bins):
+
+    rng = np.random.default_rng(seed_seq)
+
+    draws = {key: _cost_monte_carlo_draw(rng, spec, size) for key, spec in distributions.items()}
+
+    cost_dict = cost_calc_unsub_cost_array(n_periods=n_periods, **draws)
+
+    # (series, draw, period + total)
+    values = np.stack([
+        np.column_stack([cost, cost.sum(axis=1)]) for cost in cost_dict.values()
+    ])
+
+    if hist_range is None:
+        hist_range = (values.min(axis=1), values.max(axis=1))
+
+    lo, hi = hist_range
+    width = np.where(hi > lo, (hi - lo) / n_bins, 1.0)
+
+    # Bin every (series, column) at once with one bincount
+    n_cols = values.shape[0] * values.shape[2]
+
+    bins = np.clip(((values - lo[:, np.newaxis, :]) / width[:, np.newaxis, :]).astype(np.int64), 0, n_bins - 1)
+    bins = bins + (np.arange(n_cols).reshape(values.shape[0], 1, values.shape[2]) * n_bins)
+
+    counts = np.bincount(bins.ravel(), minlength=n_cols * n_bins) \
+        .reshape(values.shape[0], values.shape[2], n_bins)
+
+    return dict(
+        counts     = counts,
+        total      = values.sum(axis=1),
+        min        = values.min(axis=1),
+        max        = values.max(axis=1),
+        hist_range = hist_range
+    )
+
+
+def cost_simulate_unsub_cost_monte_carlo(
+    distributions=dict(
+        email_list_growth_rate=("triangular", 0.0, 0.035, 0.05),
+        unsub_rate_per_sales_email=("uniform", 0.001, 0.005),
+        customer_conversion_rate=("normal", 0.05, 0.005)
+    ),
+    n_draws=1000000,
+    block_size=100000,
+    n_periods=12,
+    percentiles=[5, 25, 50, 75, 95],
+    n_bins=4096,
+    seed=123,
+    n_jobs=1,
+    **kwargs
+):
+
+    if n_draws < 1 or block_size < 1:
+        raise ValueError("n_draws and block_size must be at least 1")
+
+    # Fixed inputs (scalars) go along with the sampled ones
+    distributions = {**kwargs, **distributions}
+
+    # -- Seeded Streams, One Per Block -- #
+    block_sizes = [min(block_size, n_draws - start) for start in range(0, n_draws, block_size)]
+
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(block_sizes))
+
+    # -- First Block Sets The Histogram Range (widened on both sides) -- #
+    first = _cost_monte_carlo_block(seed_seqs[0], block_sizes[0], distributions, n_periods, None, n_bins)
+
+    lo, hi = first["hist_range"]
+    pad = (hi - lo) * 0.5
+    hist_range = (lo - pad, hi + pad)
+
+    args = [
+        (seed_seq, size, distributions, n_periods, hist_range, n_bins)
+        for seed_seq, size in zip(seed_seqs, block_sizes)
+    ]
+
+    # -- Aggregate As Blocks Finish -- #
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+
+    agg = None
+
+    def _merge(agg, block):
+        if agg is None:
+            return block
+        return dict(
+            counts     = agg["counts"] + block["counts"],
+            total      = agg["total"] + block["total"],
+            min        = np.minimum(agg["min"], block["min"]),
+            max        = np.maximum(agg["max"], block["max"]),
+            hist_range = agg["hist_range"]
+        )
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for block in executor.map(_cost_monte_carlo_block, *zip(*args)):
+                agg = _merge(agg, block)
+    else:
+        for block_args in args:
+            agg = _merge(agg, _cost_monte_carlo_block(*block_args))
+
+    # -- Percentiles From The Histograms -- #
+    lo, hi = hist_range
+    width = np.where(hi > lo, (hi - lo) / n_bins, 1.0)
+
+    cum_counts = np.cumsum(agg["counts"], axis=2)
+
+    percentile_dict = dict()
+
+    for q in percentiles:
+
+        target = q / 100 * n_draws
+
+        # First bin reaching the target, then linear within that bin
+        bin_idx = (cum_counts < target).sum(axis=2)
+        bin_idx = np.minimum(bin_idx, n_bins - 1)
+
+        count = np.take_along_axis(agg["counts"], bin_idx[..., np.newaxis], axis=2)[..., 0]
+        before = np.take_along_axis(cum_counts, bin_idx[..., np.newaxis], axis=2)[..., 0] - count
+
+        frac = np.where(count > 0, (target - before) / np.maximum(count, 1), 0.0)
+
+        value = lo + width * (bin_idx + frac)
+
+        # Never outside the values actually drawn
+        percentile_dict[f"p{q:g}"] = np.clip(value, agg["min"], agg["max"])
+
+    # -- Summary: One Row Per (Series, Period), "total" = Sum Over Periods -- #
+    series_names = ["cost_no_growth", "cost_with_growth"]
+    period_labels = list(range(n_periods)) + ["total"]
+
+    summary_df = pd.DataFrame(
+        dict(
+            cost_type = np.repeat(series_names, len(period_labels)),
+            period    = period_labels * len(series_names),
+            mean      = (agg["total"] / n_draws).ravel(),
+            min       = agg["min"].ravel(),
+            max       = agg["max"].ravel(),
+            **{key: value.ravel() for key, value in percentile_dict.items()}
+        )
+    )
+
+    return summary_df
+
+
+cost_simulate_unsub_cost_monte_carlo()
+
+cost_simulate_unsub_cost_monte_carlo(
+    distributions=dict(
+        email_list_growth_rate=("normal", 0.035, 0.01),
+        customer_conversion_rate=("uniform", 0.04, 0.06)
+    ),
+    n_draws=5000000,
+    n_jobs=1,
+    sales_emails_per_month=5
+) \
+    .query("period == 'total'")
+
 
 # VISUALIZE COSTS ---------------------------------------------------------------------------
 
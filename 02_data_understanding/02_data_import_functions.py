@@ -9,72 +9,248 @@
 import pandas as pd
 import numpy as np
 import sqlalchemy as sql
+import threading
+
+
+# ENGINE REGISTRY ----
+# - One pooled engine per connection string, reused by every read function
+# - SQLite: QueuePool (1.4 defaults file databases to NullPool) + read-friendly pragmas
+SQLITE_PRAGMAS = dict(
+    journal_mode="WAL",
+    mmap_size=268435456,  # 256 MB
+    cache_size=-65536     # 64 MB (negative = KiB)
+)
+
+_ENGINE_REGISTRY = {}
+_ENGINE_REGISTRY_LOCK = threading.Lock()
+
+
+def db_get_engine(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                  pool_size=5, max_overflow=10, pool_pre_ping=True, pool_recycle=3600,
+                  sqlite_pragmas=SQLITE_PRAGMAS):
+
+    with _ENGINE_REGISTRY_LOCK:
+
+        if conn_string in _ENGINE_REGISTRY:
+            return _ENGINE_REGISTRY[conn_string]
+
+        if conn_string in ("sqlite://", "sqlite:///:memory:"):
+
+            # In-memory databases are per connection, keep the default pool
+            engine = sql.create_engine(conn_string)
+
+        elif conn_string.startswith("sqlite"):
+
+            engine = sql.create_engine(
+                conn_string,
+                poolclass=sql.pool.QueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle,
+                connect_args=dict(check_same_thread=False)
+            )
+
+            # Pragmas are per connection, so set them as each one is opened
+            @sql.event.listens_for(engine, "connect")
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for pragma, value in (sqlite_pragmas or {}).items():
+                    cursor.execute(f"pragma {pragma} = {value}")
+                cursor.close()
+
+        else:
+
+            engine = sql.create_engine(
+                conn_string,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle
+            )
+
+        _ENGINE_REGISTRY[conn_string] = engine
+
+    return engine
+
+
+def db_dispose_engines():
+
+    with _ENGINE_REGISTRY_LOCK:
+
+        for engine in _ENGINE_REGISTRY.values():
+            engine.dispose()
+
+        _ENGINE_REGISTRY.clear()
+
+
+db_get_engine() is db_get_engine()
+
+
+# SCHEMA ----
+# - Compact dtypes per table, applied while reading (parse_dates / per-chunk casts)
+# - "category" columns are cast once after the chunks are combined
+ELS_SCHEMA = dict(
+    Subscribers=dict(
+        mailchimp_id="int32",
+        member_rating="int16",
+        optin_time="datetime64[ns]",
+        country_code="category"
+    ),
+    Tags=dict(
+        mailchimp_id="int32",
+        tag="category"
+    ),
+    Transactions=dict(
+        purchased_at="datetime64[ns]",
+        product_id="int16"
+    ),
+    Products=dict(
+        product_id="int16"
+    ),
+    Website=dict(
+        date="datetime64[ns]",
+        pageviews="int32",
+        organicsearches="int32",
+        sessions="int32"
+    )
+)
+
+# Subscriber-grain output of db_read_els_data (default keeps the int32 contract the models were trained on)
+# - compact=True: the Subscribers schema + compact derived columns
+# - email_provider is derived later (process_lead_tags) and isn't typed here
+ELS_DATA_DTYPES = dict(
+    mailchimp_id="int32",
+    member_rating="int32",
+    optin_time="datetime64[ns]",
+    tag_count="int32",
+    made_purchase="int32"
+)
+
+ELS_DATA_COMPACT_DTYPES = dict(
+    **ELS_SCHEMA["Subscribers"],
+    tag_count="int16",
+    made_purchase="bool"
+)
+
+
+def _db_split_schema(schema):
+
+    parse_dates = [col for col, dtype in schema.items() if dtype.startswith("datetime64")]
+    categories = [col for col, dtype in schema.items() if dtype == "category"]
+    dtype = {col: dtype for col, dtype in schema.items() if col not in parse_dates + categories}
+
+    return dtype, parse_dates, categories
+
+
+def _db_apply_schema(df, schema):
+
+    # Dates are parsed at read, the rest is cast in place column by column (no frame copies)
+    dtype, _, categories = _db_split_schema(schema)
+
+    for col, t in {**dtype, **{col: "category" for col in categories}}.items():
+        if col in df.columns:
+            df[col] = df[col].astype(t)
+
+    return df
 
 
 # IMPORT RAW DATA ----
 
 # Read & Combine Raw Data
-def db_read_els_data(conn_string="sqlite://" + "/00_database/crm_database.sqlite"):
+# - pushdown=True: tag_count (GROUP BY) & made_purchase (IN) are computed in the
+#   database, only the subscriber-grain result is transferred
+# - IN (uncorrelated) is evaluated once, a correlated EXISTS rescans Transactions per subscriber
+# - Tag counts come back as a small second result, mapped on in pandas (no join, so the
+#   subscriber row order is the same as the pushdown=False path)
+# - pushdown=False: original path (pull Tags & Transactions, aggregate in pandas)
+# - Both paths type the result from one schema (ELS_DATA_DTYPES / ELS_DATA_COMPACT_DTYPES)
+# - made_purchase rule (both paths): the subscriber's email appears in Transactions; a NULL
+#   email never matches (NULL transaction emails don't count as a purchase by anyone)
+ELS_DATA_PUSHDOWN_QUERY = """
+    select
+        s.*,
+        coalesce(
+            s.user_email in (select user_email from Transactions where user_email is not null), 0
+        ) as made_purchase
+    from Subscribers s
+"""
+
+ELS_TAG_COUNT_PUSHDOWN_QUERY = """
+    select mailchimp_id, count(tag) as tag_count
+    from Tags
+    group by mailchimp_id
+"""
+
+
+def db_read_els_data(conn_string="sqlite://" + "/00_database/crm_database.sqlite", pushdown=True,
+                     compact=False):
+
+    # Output Schema
+    schema = ELS_DATA_COMPACT_DTYPES if compact else ELS_DATA_DTYPES
+    _, parse_dates, _ = _db_split_schema(schema)
 
     # Connect To Engine
-    engine = sql.create_engine(conn_string)
+    engine = db_get_engine(conn_string)
 
-    # Raw Data Collect
     with engine.connect() as conn:
 
-        # Subscribers
-        subscribers_df = pd.read_sql(sql="select * from Subscribers", con=conn)
+        # SQL Pushdown (dates parsed while reading)
+        if pushdown:
 
-        subscribers_df = subscribers_df \
-            .assign(mailchimp_id=lambda x: x["mailchimp_id"].astype("int32")) \
-            .assign(member_rating=lambda x: x["member_rating"].astype("int32")) \
-            .assign(optin_time=lambda x: x["optin_time"].astype("datetime64"))
+            subscribers_joined_df = pd.read_sql(sql=ELS_DATA_PUSHDOWN_QUERY, con=conn, parse_dates=parse_dates)
 
-        # Tags
-        tags_df = pd.read_sql(sql="select * from Tags", con=conn)
+            tag_count_df = pd.read_sql(sql=ELS_TAG_COUNT_PUSHDOWN_QUERY, con=conn)
 
-        tags_df = tags_df \
-            .assign(mailchimp_id=lambda x: x["mailchimp_id"].astype("int32"))
+        # Raw Data Collect (only the columns the aggregates need)
+        else:
 
-        # Transactions
-        transactions_df = pd.read_sql(
-            sql="select * from Transactions", con=conn)
+            subscribers_joined_df = pd.read_sql(sql="select * from Subscribers", con=conn, parse_dates=parse_dates)
 
-        transactions_df = transactions_df \
-            .assign(purchased_at=lambda x: x["purchased_at"].astype("datetime64")) \
-            .assign(product_id=lambda x: x["product_id"].astype("int32"))
+            tags_df = pd.read_sql(sql="select mailchimp_id, tag from Tags", con=conn)
 
-        # Merge Tag Counts
-        user_events_df = tags_df \
-            .groupby("mailchimp_id") \
-            .agg(dict(tag="count")) \
-            .set_axis(["tag_count"], axis=1) \
-            .reset_index()
+            transactions_df = pd.read_sql(sql="select user_email from Transactions", con=conn)
 
-        subscribers_joined_df = subscribers_df \
-            .merge(user_events_df, how="left") \
-            .fillna(dict(tag_count=0)) \
-            .assign(tag_count=lambda x: x["tag_count"].astype("int32"))
+            # Tag Counts
+            tag_count_df = tags_df \
+                .groupby("mailchimp_id") \
+                .agg(dict(tag="count")) \
+                .set_axis(["tag_count"], axis=1) \
+                .reset_index()
 
-        # Merge Target Variable
-        emails_made_purchase = transactions_df["user_email"].unique()
+            # Target Variable (NULL emails never match, like the SQL IN)
+            emails_made_purchase = transactions_df["user_email"].dropna().unique()
 
-        subscribers_joined_df = subscribers_joined_df \
-            .assign(country_code=lambda x: x["country_code"].str.upper()) \
-            .assign(made_purchase=lambda x: x["user_email"].isin(emails_made_purchase).astype("int32"))
+            subscribers_joined_df["made_purchase"] = subscribers_joined_df["user_email"].isin(emails_made_purchase)
 
-    return subscribers_joined_df
+    # Tag counts (before made_purchase, like the original merge)
+    subscribers_joined_df.insert(
+        len(subscribers_joined_df.columns) - 1,
+        "tag_count",
+        subscribers_joined_df["mailchimp_id"]
+            .map(tag_count_df.set_index("mailchimp_id")["tag_count"])
+            .fillna(0)
+    )
+
+    # Upper-case before the (optional) category cast
+    subscribers_joined_df["country_code"] = subscribers_joined_df["country_code"].str.upper()
+
+    return _db_apply_schema(subscribers_joined_df, schema)
 
 
 db_read_els_data().head()
 
 db_read_els_data().info()
 
+db_read_els_data(pushdown=False).equals(db_read_els_data(pushdown=True))
+
+db_read_els_data(compact=True).info(memory_usage="deep")
+
 
 # Read Table Names
 def db_read_els_table_names(conn_string="sqlite://" + "/00_database/crm_database.sqlite"):
 
-    engine = sql.create_engine(conn_string)
+    engine = db_get_engine(conn_string)
 
     table_names = sql.inspect(engine).get_table_names()
 
@@ -84,20 +260,98 @@ def db_read_els_table_names(conn_string="sqlite://" + "/00_database/crm_database
 db_read_els_table_names()
 
 
-# Get Raw Table
-def db_read_els_raw_table(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
-                          table_name="Products"):
+# Stream Raw Table (Chunks)
+# - columns: projection (default all), where: SQL predicate with :named params
+# - dtype: dict of column -> dtype applied to every chunk
+def db_read_els_raw_table_chunks(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                                 table_name="Products", columns=None, where=None, params=None,
+                                 dtype=None, parse_dates=None, chunksize=100000):
 
-    engine = sql.create_engine(conn_string)
+    engine = db_get_engine(conn_string)
 
-    with engine.connect() as conn:
+    query = f"select {', '.join(columns) if columns else '*'} from {table_name}"
+
+    if where:
+        query = f"{query} where {where}"
+
+    # Server-side cursor where the driver supports it (rows are fetched as consumed)
+    with engine.connect().execution_options(stream_results=True) as conn:
+
+        n_chunks = 0
+
+        for chunk_df in pd.read_sql(sql=sql.text(query), con=conn, params=params or {},
+                                    parse_dates=parse_dates, chunksize=chunksize):
+
+            n_chunks += 1
+
+            yield _db_cast_chunk(chunk_df, dtype)
+
+        # No rows: still yield one empty chunk with the right columns
+        if n_chunks == 0:
+
+            empty_df = pd.read_sql(sql=sql.text(f"select * from ({query}) as q limit 0"), con=conn,
+                                   params=params or {}, parse_dates=parse_dates)
 
-        df = pd.read_sql(sql=f"select * from {table_name}", con=conn)
+            yield _db_cast_chunk(empty_df, dtype)
+
+
+def _db_cast_chunk(chunk_df, dtype):
+
+    # Only cast the projected columns
+    dtype = {col: t for col, t in (dtype or {}).items() if col in chunk_df.columns}
+
+    return chunk_df.astype(dtype) if dtype else chunk_df
+
+
+# Tag counts without holding the Tags table in memory
+pd.concat([
+    chunk_df.groupby("mailchimp_id").size()
+    for chunk_df in db_read_els_raw_table_chunks(table_name="Tags", columns=["mailchimp_id"])
+]) \
+    .groupby(level=0) \
+    .sum()
+
+
+# Get Raw Table
+def db_read_els_raw_table(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                          table_name="Products", columns=None, where=None, params=None,
+                          dtype=None, chunksize=100000, typed=False):
+
+    # Typed: compact dtypes from ELS_SCHEMA (explicit `dtype` wins)
+    parse_dates, categories = None, []
+
+    if typed:
+        schema_dtype, parse_dates, categories = _db_split_schema(ELS_SCHEMA.get(table_name, {}))
+        dtype = {**schema_dtype, **(dtype or {})}
+
+    chunk_list = list(
+        db_read_els_raw_table_chunks(
+            conn_string=conn_string,
+            table_name=table_name,
+            columns=columns,
+            where=where,
+            params=params,
+            dtype=dtype,
+            parse_dates=parse_dates,
+            chunksize=chunksize
+        )
+    )
+
+    df = pd.concat(chunk_list, ignore_index=True)
+
+    for col in categories:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
     return df
 
 
 db_read_els_raw_table(table_name="Website")
 
+db_read_els_raw_table(table_name="Tags", typed=True).info(memory_usage="deep")
+
+db_read_els_raw_table(table_name="Transactions", columns=["user_email", "purchased_at"],
+                      where="purchased_at >= :start", params=dict(start="2019-01-01"))
+
 
 # TEST IT OUT -----
@@ -8,6 +8,10 @@
 # Core
 import pandas as pd
 import numpy as np
+import sqlalchemy as sql
+import scipy.sparse as sp
+import os
+import json
 
 # EDA 
 import re
@@ -20,7 +24,13 @@ df_tags = els.db_read_els_raw_table(table_name="Tags")
 
 
 # 1.0 Create Processing Function ----
-def process_lead_tags(df_leads, df_tags):
+# tag_format:
+#   "dense"  - float64 pivot (original)
+#   "uint8" / "bool" - dense 0/1 columns, 8x smaller than float64
+#   "sparse" - pandas SparseDtype(uint8) tag columns built from a CSR matrix, for storage /
+#              exploration only: the model pipelines score dense frames, so densify the tag
+#              columns first (`.sparse.to_coo()` works on the tag columns, not the mixed frame)
+def process_lead_tags(df_leads, df_tags, tag_format="dense"):
     
     
     # Leads Data
@@ -29,23 +39,55 @@ def process_lead_tags(df_leads, df_tags):
         .assign(email_provider = lambda x: x["user_email"].str.split("@").str[1]) \
         .assign(tag_count_by_optin_day = lambda x: x["tag_count"] / abs(x["optin_days"] - 1))
         
-    # Tags Wide Data
-    df_2 = df_tags \
-        .assign(value = lambda x: 1) \
-        .pivot(
-            index   = "mailchimp_id",
-            columns = "tag",
-            values  = "value"            
-        ) \
-        .fillna(value = 0) \
-        .rename(columns = lambda x: x.replace("-", "_").lower()) \
-        .add_prefix("tag_") \
-        .reset_index()
-    
-    # Merge
-    df_leads_tags = df_1 \
-        .merge(df_2, how = "left") \
-        .fillna({col: 0 for col in df_2.columns if col.startswith("tag_")})
+    # Tags Wide Data (Compact, No Pivot)
+    if tag_format != "dense":
+        
+        df_1 = df_1.reset_index(drop=True)
+        
+        # Row = position of the lead, Col = tag (sorted, like pivot)
+        tag_categories = np.sort(df_tags["tag"].unique())
+        
+        row_idx = pd.Index(df_1["mailchimp_id"]).get_indexer(df_tags["mailchimp_id"])
+        col_idx = pd.Categorical(df_tags["tag"], categories=tag_categories).codes
+        
+        keep = row_idx >= 0
+        
+        tag_matrix = sp.csr_matrix(
+            (np.ones(keep.sum(), dtype="uint8"), (row_idx[keep], col_idx[keep])),
+            shape=(len(df_1), len(tag_categories))
+        )
+        tag_matrix.sum_duplicates()
+        tag_matrix.data[:] = 1
+        
+        tag_columns = ["tag_" + tag.replace("-", "_").lower() for tag in tag_categories]
+        
+        if tag_format == "sparse":
+            df_2 = pd.DataFrame.sparse.from_spmatrix(tag_matrix, columns=tag_columns)
+        else:
+            df_2 = pd.DataFrame(tag_matrix.toarray().astype(tag_format), columns=tag_columns)
+        
+        # Merge (Row Aligned)
+        df_leads_tags = pd.concat([df_1, df_2], axis=1)
+    
+    else:
+        
+        # Tags Wide Data
+        df_2 = df_tags \
+            .assign(value = lambda x: 1) \
+            .pivot(
+                index   = "mailchimp_id",
+                columns = "tag",
+                values  = "value"            
+            ) \
+            .fillna(value = 0) \
+            .rename(columns = lambda x: x.replace("-", "_").lower()) \
+            .add_prefix("tag_") \
+            .reset_index()
+        
+        # Merge
+        df_leads_tags = df_1 \
+            .merge(df_2, how = "left") \
+            .fillna({col: 0 for col in df_2.columns if col.startswith("tag_")})
     
     # High Cardinality
     # countries_to_keep =  els.explore_sales_by_category(data=df_leads_tags, category="country_code") \
@@ -87,16 +129,40 @@ def process_lead_tags(df_leads, df_tags):
 # 2.0 Test Out ----
 process_lead_tags(df_leads, df_tags).head()
 
+process_lead_tags(df_leads, df_tags, tag_format="sparse").memory_usage(deep=True).sum()
+
+# Sparse tags -> scoring: densify the tag columns (uint8) first
+df_sparse = process_lead_tags(df_leads, df_tags, tag_format="sparse")
+
+sparse_columns = [col for col, dtype in df_sparse.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+
+df_sparse[sparse_columns].sparse.to_coo().tocsr()
+
+df_sparse.astype({col: "uint8" for col in sparse_columns}).info()
+
 
 
 # 3.0 Improve On Pipeline ----
-def db_read_and_process_els_data(conn_string="sqlite://" + "/00_database/crm_database.sqlite"):
+def db_read_and_process_els_data(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                                 incremental=False, feature_table_path=None,
+                                 feature_store_dir=None, columns=None, tag_format="dense"):
+    
+    # Feature Store: read the materialized (Parquet/Arrow) leads, only the columns needed
+    if feature_store_dir is not None:
+        return els.feature_store_read(store_dir=feature_store_dir, columns=columns)
+    
+    # Incremental: refresh the persisted feature table with the CRM delta only
+    if incremental:
+        return db_refresh_els_features(
+            conn_string=conn_string,
+            feature_table_path=feature_table_path or FEATURE_TABLE_PATH
+        )
     
     df_leads = els.db_read_els_data(conn_string=conn_string)
     
     df_tags = els.db_read_els_raw_table(conn_string=conn_string, table_name="Tags")
     
-    df = process_lead_tags(df_leads, df_tags)
+    df = process_lead_tags(df_leads, df_tags, tag_format=tag_format)
     
     return(df)
 
@@ -107,3 +173,185 @@ def db_read_and_process_els_data(conn_string="sqlite://" + "/00_database/crm_dat
 import email_lead_scoring as els
 
 els.db_read_and_process_els_data().info()
+
+
+
+# 5.0 Incremental Pipeline ----
+# - Persist the processed leads + high-water marks (optin_time, Tags rowid, purchased_at)
+# - On refresh only re-process subscribers that are new, got new tags or made a new purchase
+# - optin_days depends on the latest optin_time, so it is recomputed for every row (cheap)
+FEATURE_TABLE_PATH = "00_database/leads_features.pkl"
+
+
+def _db_read_high_water_marks(conn):
+    
+    return dict(
+        optin_time   = conn.execute(sql.text("select max(optin_time) from Subscribers")).scalar(),
+        tags_rowid   = conn.execute(sql.text("select max(rowid) from Tags")).scalar(),
+        purchased_at = conn.execute(sql.text("select max(purchased_at) from Transactions")).scalar()
+    )
+
+
+def _db_read_where_in(conn, query, values, chunk_size=500, parse_dates=None):
+    
+    # SQLite caps the number of bound parameters, so bind the IN list in chunks
+    values = list(values)
+    
+    # Empty result with the right columns (for an empty `values`)
+    df_list = [pd.read_sql(sql=sql.text(query.format(in_clause="select null where 0")), con=conn,
+                           parse_dates=parse_dates)]
+    
+    for start in range(0, len(values), chunk_size):
+        
+        chunk = values[start:start + chunk_size]
+        params = {f"v_{i}": value for i, value in enumerate(chunk)}
+        in_clause = ", ".join(f":v_{i}" for i in range(len(chunk)))
+        
+        df_list.append(pd.read_sql(sql=sql.text(query.format(in_clause=in_clause)), con=conn, params=params,
+                                   parse_dates=parse_dates))
+    
+    return pd.concat(df_list, ignore_index=True)
+
+
+def _db_read_els_data_subset(conn, mailchimp_ids):
+    
+    # Same steps & schema as db_read_els_data, restricted to `mailchimp_ids`
+    mailchimp_ids = [int(x) for x in mailchimp_ids]
+    
+    schema = els.ELS_DATA_DTYPES
+    _, parse_dates, _ = els._db_split_schema(schema)
+    
+    subscribers_joined_df = _db_read_where_in(
+        conn, "select * from Subscribers where mailchimp_id in ({in_clause})", mailchimp_ids,
+        parse_dates=parse_dates
+    )
+    
+    tags_df = _db_read_where_in(conn, "select * from Tags where mailchimp_id in ({in_clause})", mailchimp_ids)
+    
+    tags_df = els._db_apply_schema(tags_df, dict(mailchimp_id=schema["mailchimp_id"]))
+    
+    # NULL emails never match (same rule as db_read_els_data)
+    emails_made_purchase = _db_read_where_in(
+        conn,
+        "select distinct user_email from Transactions where user_email in ({in_clause})",
+        subscribers_joined_df["user_email"].dropna().unique()
+    )["user_email"]
+    
+    subscribers_joined_df["made_purchase"] = subscribers_joined_df["user_email"].isin(emails_made_purchase.dropna())
+    
+    # Tag counts (before made_purchase, like db_read_els_data)
+    subscribers_joined_df.insert(
+        len(subscribers_joined_df.columns) - 1,
+        "tag_count",
+        subscribers_joined_df["mailchimp_id"]
+            .astype(schema["mailchimp_id"])
+            .map(tags_df.groupby("mailchimp_id")["tag"].count())
+            .fillna(0)
+    )
+    
+    subscribers_joined_df["country_code"] = subscribers_joined_df["country_code"].str.upper()
+    
+    return els._db_apply_schema(subscribers_joined_df, schema), tags_df
+
+
+def db_refresh_els_features(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                            feature_table_path=FEATURE_TABLE_PATH, full_refresh=False):
+    
+    state_path = os.path.splitext(feature_table_path)[0] + "_state.json"
+    
+    engine = els.db_get_engine(conn_string)
+    
+    with engine.connect() as conn:
+        
+        high_water_marks = _db_read_high_water_marks(conn)
+        
+        # First run (or forced): full build, then persist
+        if full_refresh or not (os.path.exists(feature_table_path) and os.path.exists(state_path)):
+            
+            df = db_read_and_process_els_data(conn_string=conn_string)
+        
+        else:
+            
+            df = pd.read_pickle(feature_table_path)
+            
+            with open(state_path) as f:
+                last_marks = json.load(f)
+            
+            # Delta: new subscribers, new tags, new purchases (bounded by this run's marks)
+            new_subscriber_ids = pd.read_sql(
+                sql=sql.text("select mailchimp_id from Subscribers where optin_time > :lo and optin_time <= :hi"),
+                con=conn,
+                params=dict(lo=last_marks["optin_time"], hi=high_water_marks["optin_time"])
+            )["mailchimp_id"]
+            
+            new_tag_ids = pd.read_sql(
+                sql=sql.text("select distinct mailchimp_id from Tags where rowid > :lo and rowid <= :hi"),
+                con=conn,
+                params=dict(lo=last_marks["tags_rowid"] or 0, hi=high_water_marks["tags_rowid"] or 0)
+            )["mailchimp_id"]
+            
+            new_purchase_ids = pd.read_sql(
+                sql=sql.text(
+                    "select distinct s.mailchimp_id from Subscribers s "
+                    "join Transactions t on t.user_email = s.user_email "
+                    "where t.purchased_at > :lo and t.purchased_at <= :hi"
+                ),
+                con=conn,
+                params=dict(lo=last_marks["purchased_at"], hi=high_water_marks["purchased_at"])
+            )["mailchimp_id"]
+            
+            affected_ids = pd.concat([new_subscriber_ids, new_tag_ids, new_purchase_ids]).astype("int32").unique()
+            
+            if len(affected_ids) > 0:
+                
+                df_leads_delta, df_tags_delta = _db_read_els_data_subset(conn, affected_ids)
+                
+                df_delta = process_lead_tags(df_leads_delta, df_tags_delta)
+                
+                # Upsert: replace affected rows in place, append brand new subscribers
+                row_position = pd.Series(np.arange(len(df)), index=df["mailchimp_id"].values)
+                
+                df = pd.concat([df[~df["mailchimp_id"].isin(affected_ids)], df_delta], ignore_index=True) \
+                    .assign(_row_position=lambda x: x["mailchimp_id"].map(row_position)) \
+                    .sort_values("_row_position", kind="mergesort", na_position="last") \
+                    .drop("_row_position", axis=1) \
+                    .reset_index(drop=True)
+                
+                # New tags become new columns (0 for everyone else), in the pivot's order:
+                # sorted by raw tag value (case / "-" change the order of the column names)
+                lead_columns = [col for col in df_delta.columns if col in df_leads_delta.columns] \
+                    + ["optin_days", "email_provider", "tag_count_by_optin_day"]
+                
+                raw_tags = pd.read_sql(sql=sql.text("select distinct tag from Tags where tag is not null"), con=conn)["tag"]
+                
+                tag_order = {}
+                for tag in np.sort(raw_tags.to_numpy()):
+                    tag_order.setdefault("tag_" + tag.replace("-", "_").lower(), len(tag_order))
+                
+                tag_columns = sorted(
+                    (col for col in df.columns if col not in lead_columns),
+                    key=lambda col: tag_order.get(col, len(tag_order))
+                )
+                
+                df = df[lead_columns + tag_columns].fillna({col: 0 for col in tag_columns})
+            
+            # Global: optin_days is relative to the latest optin
+            df = df \
+                .assign(optin_days = lambda x: (x["optin_time"] - x["optin_time"].max()).dt.days) \
+                .assign(tag_count_by_optin_day = lambda x: x["tag_count"] / abs(x["optin_days"] - 1))
+    
+    # Persist table + marks
+    os.makedirs(os.path.dirname(feature_table_path) or ".", exist_ok=True)
+    
+    df.to_pickle(feature_table_path)
+    
+    with open(state_path, "w") as f:
+        json.dump(high_water_marks, f, default=str)
+    
+    return df
+
+
+# Nightly Refresh
+db_refresh_els_features(full_refresh=True).shape
+
+els.db_read_and_process_els_data(incremental=True).shape
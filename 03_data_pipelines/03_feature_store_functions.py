@@ -0,0 +1,127 @@
+# BUSINESS SCIENCE UNIVERSITY
+# COURSE: DS4B 201-P PYTHON MACHINE LEARNING
+# MODULE 3: FEATURE STORE (PARQUET / ARROW) FOR PROCESSED LEADS
+# ----
+
+# LIBRARIES ----
+
+# Core
+import pandas as pd
+import os
+import tempfile
+from datetime import datetime
+
+# Columnar
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+import email_lead_scoring as els
+
+# Data Import
+leads_df = els.db_read_and_process_els_data()
+
+
+# 1.0 Write A Version ----
+# - One directory per version: <store_dir>/v=<YYYYmmddTHHMMSS>/leads.<parquet|arrow>
+# - Versions are never overwritten: a second write in the same second gets a -01, -02, ...
+#   suffix (still sorts in write order), an explicit `version` that exists raises
+# - pandas metadata is stored with the file, so int32 / category / datetime dtypes round trip
+# - "arrow" (uncompressed IPC) can be memory-mapped zero-copy, "parquet" is smaller on disk
+FEATURE_STORE_DIR = "00_database/feature_store"
+
+
+def feature_store_write(data, store_dir=FEATURE_STORE_DIR, version=None, file_format="parquet"):
+
+    os.makedirs(store_dir, exist_ok=True)
+
+    if version is None:
+        base = datetime.now().strftime("%Y%m%dT%H%M%S")
+        suffix = 0
+        while True:
+            version = base if suffix == 0 else f"{base}-{suffix:02d}"
+            try:
+                os.mkdir(os.path.join(store_dir, f"v={version}"))
+                break
+            except FileExistsError:
+                suffix += 1
+    else:
+        os.mkdir(os.path.join(store_dir, f"v={version}"))
+
+    version_dir = os.path.join(store_dir, f"v={version}")
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    if file_format == "arrow":
+        feather.write_feather(table, os.path.join(version_dir, "leads.arrow"), compression="uncompressed")
+    else:
+        pq.write_table(table, os.path.join(version_dir, "leads.parquet"))
+
+    # Latest pointer (written last, so readers never see a half-written version)
+    # Temp file + os.replace: readers see the old or the new pointer, never a partial one
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, prefix=".LATEST.")
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(store_dir, "LATEST"))
+
+    return version
+
+
+feature_store_write(leads_df)
+
+
+# 2.0 List Versions ----
+def feature_store_list_versions(store_dir=FEATURE_STORE_DIR):
+
+    if not os.path.isdir(store_dir):
+        return []
+
+    versions = [d[len("v="):] for d in os.listdir(store_dir) if d.startswith("v=")]
+
+    return sorted(versions)
+
+
+feature_store_list_versions()
+
+
+# 3.0 Read A Version (Selected Columns) ----
+def feature_store_read(store_dir=FEATURE_STORE_DIR, version="latest", columns=None, memory_map=True):
+
+    if version == "latest":
+        with open(os.path.join(store_dir, "LATEST")) as f:
+            version = f.read().strip()
+
+    version_dir = os.path.join(store_dir, f"v={version}")
+
+    arrow_path = os.path.join(version_dir, "leads.arrow")
+
+    if os.path.exists(arrow_path):
+        table = feather.read_table(arrow_path, columns=columns, memory_map=memory_map)
+    else:
+        table = pq.read_table(os.path.join(version_dir, "leads.parquet"), columns=columns, memory_map=memory_map)
+
+    return table.to_pandas()
+
+
+feature_store_read().info()
+
+feature_store_read(columns=["mailchimp_id", "user_email", "made_purchase"]).head()
+
+
+# 4.0 Materialize From The CRM ----
+def feature_store_materialize(conn_string="sqlite://" + "/00_database/crm_database.sqlite",
+                              store_dir=FEATURE_STORE_DIR, file_format="parquet"):
+
+    df = els.db_read_and_process_els_data(conn_string=conn_string)
+
+    return feature_store_write(df, store_dir=store_dir, file_format=file_format)
+
+
+feature_store_materialize(file_format="arrow")
+
+
+# 5.0 Try Out Package ----
+
+import email_lead_scoring as els
+
+els.db_read_and_process_els_data(feature_store_dir=FEATURE_STORE_DIR, columns=["mailchimp_id", "made_purchase"]).info()
@@ -7,6 +7,9 @@
 # =========================================================================
 # LIBRARIES 
 # =========================================================================
+import os
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 import pycaret.classification as clf
@@ -18,13 +21,78 @@ import email_lead_scoring as els
 # =========================================================================
 leads_df = els.db_read_and_process_els_data()
 
+# =========================================================================
+# MODEL CACHE (PROCESS-WIDE, LRU, INVALIDATED WHEN THE .PKL CHANGES)
+# =========================================================================
+MODEL_CACHE_MAX_SIZE = 4
+
+_MODEL_CACHE = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _model_file_stamp(model_name):
+    
+    # - pycaret saves "<model_name>.pkl"
+    stat = os.stat(model_name + ".pkl")
+    
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def model_load_cached(model_path, max_size = None):
+    
+    # - Accept paths with or without the .pkl extension
+    model_name = model_path[:-len(".pkl")] if model_path.endswith(".pkl") else model_path
+    
+    # - Key by absolute path, validate by file mtime/size
+    key = os.path.abspath(model_name)
+    stamp = _model_file_stamp(model_name)
+    
+    with _MODEL_CACHE_LOCK:
+        if key in _MODEL_CACHE and _MODEL_CACHE[key][0] == stamp:
+            _MODEL_CACHE.move_to_end(key)
+            return _MODEL_CACHE[key][1]
+    
+    # - Load outside the lock (slow), then insert
+    model = clf.load_model(model_name, verbose = False)
+    
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[key] = (stamp, model)
+        _MODEL_CACHE.move_to_end(key)
+        
+        # - Evict least recently used
+        while len(_MODEL_CACHE) > (max_size or MODEL_CACHE_MAX_SIZE):
+            _MODEL_CACHE.popitem(last = False)
+    
+    return model
+
+
+def model_cache_warmup(model_paths = ["models/pycaret/xgb_model_single_tuned_finalized"]):
+    
+    for model_path in model_paths:
+        model_load_cached(model_path)
+    
+    return list(_MODEL_CACHE.keys())
+
+
+def model_cache_clear():
+    
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+
+
+model_cache_warmup()
+
+
 # =========================================================================
 # MODEL LOAD FUNCTION
 # =========================================================================
-def model_score_leads(data, model_path = "models/blended_model_final"):
+def model_score_leads(data, model_path = "models/blended_model_final", use_cache = True):
     
     # - Load model
-    model = clf.load_model(model_path)
+    if use_cache:
+        model = model_load_cached(model_path)
+    else:
+        model = clf.load_model(model_path)
     
     # - Get predictions
     predictions_df = clf.predict_model(estimator = model, data = data)
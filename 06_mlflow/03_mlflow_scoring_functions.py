@@ -4,8 +4,13 @@
 # PART 3: PREDICTION FUNCTION 
 # ----
 
+import os
+import time
+import threading
+from collections import OrderedDict
 import pandas as pd
 import mlflow
+from mlflow.utils.file_utils import local_file_uri_to_path
 import email_lead_scoring as els
 
 leads_df = els.db_read_and_process_els_data()
@@ -61,6 +66,73 @@ mlflow_get_best_run(experiment_name = "automl_lead_scoring_1")
 mlflow_get_best_run(experiment_name = "email_lead_scoring_0")
 
 
+# Cached Best Run ----
+# - One search_runs per (experiment, metric, tag_source) until the TTL expires
+#   or a new run directory lands in mlruns/<experiment_id>/
+BEST_RUN_CACHE_TTL = 300
+
+_BEST_RUN_CACHE = {}
+_EXPERIMENT_ID_CACHE = {}
+
+
+def _mlflow_experiment_dir_stamp(experiment_id):
+    
+    # Only the local file store (mlruns/) can be watched
+    tracking_uri = mlflow.get_tracking_uri()
+    
+    if not tracking_uri.startswith("file:") and "://" in tracking_uri:
+        return None
+    
+    experiment_dir = os.path.join(local_file_uri_to_path(tracking_uri), str(experiment_id))
+    
+    try:
+        return os.stat(experiment_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+def mlflow_get_best_run_cached(
+    experiment_name, 
+    n          = 1, 
+    metric     = "metrics.auc", 
+    tag_source = ["finalize_model", "h2o_automl_model"],
+    ascending  = False,
+    ttl        = None
+):
+    
+    if experiment_name not in _EXPERIMENT_ID_CACHE:
+        _EXPERIMENT_ID_CACHE[experiment_name] = mlflow.get_experiment_by_name(experiment_name).experiment_id
+    
+    experiment_id = _EXPERIMENT_ID_CACHE[experiment_name]
+    
+    key = (experiment_name, n, metric, tuple(tag_source), ascending)
+    stamp = _mlflow_experiment_dir_stamp(experiment_id)
+    ttl = BEST_RUN_CACHE_TTL if ttl is None else ttl
+    
+    if key in _BEST_RUN_CACHE:
+        cached_at, cached_stamp, best_run_id = _BEST_RUN_CACHE[key]
+        
+        if (time.time() - cached_at) < ttl and cached_stamp == stamp:
+            return best_run_id
+    
+    best_run_id = mlflow_get_best_run(
+        experiment_name = experiment_name,
+        n               = n,
+        metric          = metric,
+        tag_source      = tag_source,
+        ascending       = ascending
+    )
+    
+    _BEST_RUN_CACHE[key] = (time.time(), stamp, best_run_id)
+    
+    return best_run_id
+
+
+mlflow_get_best_run_cached(experiment_name = "automl_lead_scoring_1")
+
+mlflow_get_best_run_cached(experiment_name = "automl_lead_scoring_1", ttl = 0)
+
+
 # ========================================================================
 # 2.0 PREDICT WITH THE MODEL (LEAD SCORING FUNCTION)
 # ========================================================================
@@ -81,13 +153,52 @@ logged_model = f"runs:/{run_id}/model"
 loaded_model = mlflow.pyfunc.load_model(logged_model)
 loaded_model._model_impl.predict_proba(leads_df)[:, 1]
 
+# Cached PyFunc Models ----
+# - A logged run's model never changes, so cache by run_id (LRU bounded)
+PYFUNC_CACHE_MAX_SIZE = 4
+
+_PYFUNC_CACHE = OrderedDict()
+_PYFUNC_CACHE_LOCK = threading.Lock()
+
+
+def mlflow_load_model_cached(run_id, max_size = None):
+    
+    with _PYFUNC_CACHE_LOCK:
+        if run_id in _PYFUNC_CACHE:
+            _PYFUNC_CACHE.move_to_end(run_id)
+            return _PYFUNC_CACHE[run_id]
+    
+    loaded_model = mlflow.pyfunc.load_model(f"runs:/{run_id}/model")
+    
+    with _PYFUNC_CACHE_LOCK:
+        _PYFUNC_CACHE[run_id] = loaded_model
+        _PYFUNC_CACHE.move_to_end(run_id)
+        
+        while len(_PYFUNC_CACHE) > (max_size or PYFUNC_CACHE_MAX_SIZE):
+            _PYFUNC_CACHE.popitem(last = False)
+    
+    return loaded_model
+
+
+def mlflow_cache_clear():
+    
+    with _PYFUNC_CACHE_LOCK:
+        _PYFUNC_CACHE.clear()
+    
+    _BEST_RUN_CACHE.clear()
+    _EXPERIMENT_ID_CACHE.clear()
+
+
 # Function
-def mlflow_score_leads(data, run_id):
+def mlflow_score_leads(data, run_id, use_cache = True):
     
     logged_model = f"runs:/{run_id}/model"
     print(logged_model)
 
-    loaded_model = mlflow.pyfunc.load_model(logged_model)
+    if use_cache:
+        loaded_model = mlflow_load_model_cached(run_id)
+    else:
+        loaded_model = mlflow.pyfunc.load_model(logged_model)
     
     # Predict
     try:
@@ -107,6 +218,9 @@ def mlflow_score_leads(data, run_id):
 mlflow_score_leads(data = leads_df, run_id = mlflow_get_best_run("automl_lead_scoring_1"))
 
 mlflow_score_leads(data = leads_df, run_id = mlflow_get_best_run("email_lead_scoring_0"))
+
+# Cached (no file store scan, no model load after the first call)
+mlflow_score_leads(data = leads_df, run_id = mlflow_get_best_run_cached("automl_lead_scoring_1"))
     
 
 
@@ -11,6 +11,7 @@
 import pandas as pd
 import numpy as np
 import plotly.express as px
+from itertools import product
 import email_lead_scoring as els
 
 
@@ -25,6 +26,90 @@ leads_scored_df = els.model_score_leads(
 )
 
 
+ # ---------------------------------------------------------------------------- #
+ #                 0.0 GAIN CURVE (RANK THE SCORED LEADS ONCE)                  #
+ # ---------------------------------------------------------------------------- #
+
+#   GainCurve
+# - Built once from (score, made_purchase), shared by the strategy, the threshold
+#   sweep and the plots (pass `gain_curve = ...`) instead of re-sorting each time
+# - Descending float32 score, ties keep their input order (stable argsort)
+# - Everything is a NumPy array in rank order, `order` maps ranks back to input rows
+
+class GainCurve:
+
+    def __init__(self, score, made_purchase, n_deciles = 10):
+
+        score         = np.asarray(score, dtype = np.float32)
+        made_purchase = np.asarray(made_purchase, dtype = np.int64)
+
+        # Rank Leads (Single Sort)
+        self.order         = np.argsort(-score, kind = 'stable')
+        self.score         = score[self.order]
+        self.made_purchase = made_purchase[self.order]
+
+        self.total_count = len(score)
+        self.rank        = np.arange(1, self.total_count + 1)
+
+        # Cumulative Purchases, Gain & Lift
+        self.cum_purchases   = np.concatenate([[0], np.cumsum(self.made_purchase)])
+        self.total_purchases = int(self.cum_purchases[-1])
+
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+
+            self.gain = self.cum_purchases[1:] / self.total_purchases
+            self.lift = self.gain / (self.rank / self.total_count)
+
+            # Decile Stats (decile 1 = highest scores)
+            decile = (np.arange(self.total_count) * n_deciles) // max(self.total_count, 1)
+
+            self.decile_count           = np.bincount(decile, minlength = n_deciles)
+            self.decile_purchases       = np.bincount(decile, weights = self.made_purchase, minlength = n_deciles)
+            self.decile_conversion_rate = self.decile_purchases / self.decile_count
+            self.decile_lift            = self.decile_conversion_rate / (self.total_purchases / self.total_count)
+            self.decile_cum_gain        = np.cumsum(self.decile_purchases) / self.total_purchases
+
+    @classmethod
+    def from_scored_leads(cls, data, n_deciles = 10):
+
+        # `data` should be `leads_scored_df`
+        return cls(data['Score'].to_numpy(), data['made_purchase'].to_numpy(), n_deciles = n_deciles)
+
+    def hot_lead_count(self, thresh):
+
+        # Hot-Leads: gain <= thresh (gain is non-decreasing), scalar or array of thresholds
+        return np.searchsorted(self.gain, thresh, side = 'right')
+
+    def is_hot_lead(self, thresh):
+
+        # Boolean mask in input row order
+        hot = np.zeros(self.total_count, dtype = bool)
+        hot[self.order[:self.hot_lead_count(thresh)]] = True
+
+        return hot
+
+    def decile_table(self):
+
+        return pd.DataFrame({
+            'decile'          : np.arange(1, len(self.decile_count) + 1),
+            'count'           : self.decile_count,
+            'made_purchases'  : self.decile_purchases,
+            'conversion_rate' : self.decile_conversion_rate,
+            'lift'            : self.decile_lift,
+            'cum_gain'        : self.decile_cum_gain
+        })
+
+#! ---- End Class ---- #
+
+
+# Workflow
+gain_curve = GainCurve.from_scored_leads(leads_scored_df)
+
+gain_curve.hot_lead_count(np.array([0.5, 0.9, 0.95]))
+
+gain_curve.decile_table()
+
+
  # ---------------------------------------------------------------------------- #
  #            1.0 MAKE THE LEAD STRATEGY FROM THE SCORED SUBSCRIBERS            #
  # ---------------------------------------------------------------------------- #
@@ -35,18 +120,25 @@ def lead_make_strategy(
     data               = leads_scored_df,
     thresh             = 0.95,
     for_marketing_team = False,
+    gain_curve         = None,
     verbose            = False
 ):
 
     # Rank Leads
     leads_scored_small_df = data[['user_email', 'Score', 'made_purchase']]
 
-    leads_ranked_df = leads_scored_small_df \
-		.sort_values('Score', ascending = False) \
-		.assign(rank = lambda x: np.arange(0, len(x['made_purchase'])) + 1) \
-		.assign(
-      gain = lambda x: np.cumsum(x['made_purchase']) / np.sum(x['made_purchase'])
-    )
+    if gain_curve is None:
+        leads_ranked_df = leads_scored_small_df \
+            .sort_values('Score', ascending = False) \
+            .assign(rank = lambda x: np.arange(0, len(x['made_purchase'])) + 1) \
+            .assign(
+                gain = lambda x: np.cumsum(x['made_purchase']) / np.sum(x['made_purchase'])
+            )
+    else:
+        # Already Ranked (GainCurve)
+        leads_ranked_df = leads_scored_small_df \
+            .iloc[gain_curve.order] \
+            .assign(rank = gain_curve.rank, gain = gain_curve.gain)
 
     # Make Strategy
     strategy_df = leads_ranked_df \
@@ -222,16 +314,178 @@ lead_make_strategy(
     )
 
 
+# lead_strategy_calc_expected_value_array()
+# Same math as above, but array-in / array-out (one element per threshold)
+
+def lead_strategy_calc_expected_value_array(
+    hot_lead_count,
+    cold_lead_count,
+    made_purchases,
+    missed_purchases,
+    email_list_size = 100000,
+    unsub_rate_per_sales_email = 0.005,
+    sales_emails_per_month = 5,
+    avg_sales_per_month = 250000,
+    avg_sales_emails_per_month = 5,
+    customer_conversion_rate = 0.05,
+    avg_customer_value = 2000
+):
+
+    # Define Variables (Broadcast Against Each Other)
+    hot_lead_count   = np.asarray(hot_lead_count)
+    cold_lead_count  = np.asarray(cold_lead_count)
+    made_purchases   = np.asarray(made_purchases)
+    missed_purchases = np.asarray(missed_purchases)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+
+        # Confusion Matrix Summaries
+        total_count          = (cold_lead_count + hot_lead_count)
+        sample_factor        = email_list_size / total_count
+        sales_per_email_sent = avg_sales_per_month / avg_sales_emails_per_month
+
+        # [Savings] Cold That Are Not Targeted
+        savings_cold_no_target = cold_lead_count \
+            * (sales_emails_per_month * unsub_rate_per_sales_email) \
+            * (customer_conversion_rate * avg_customer_value) \
+            * sample_factor
+
+        # [Cost] Missed Sales That Are Not Targeted
+        missed_purchase_ratio = missed_purchases / (missed_purchases + made_purchases)
+        cost_missed_purchases = (sales_per_email_sent * sales_emails_per_month * missed_purchase_ratio)
+
+        # [Savings] Sales Achieved
+        made_purchase_ratio = made_purchases / (missed_purchases + made_purchases)
+        savings_made_purchases = (sales_per_email_sent * sales_emails_per_month * made_purchase_ratio)
+
+        # Expected Value, Savings & Saved Customers
+        ev  = savings_made_purchases + savings_cold_no_target - cost_missed_purchases
+        es  = savings_cold_no_target - cost_missed_purchases
+        esc = savings_cold_no_target / avg_customer_value
+
+    # Common Shape For All Outputs
+    ev, es, savings_made_purchases, esc = np.broadcast_arrays(
+        ev, es, savings_made_purchases, esc
+    )
+
+    # Return (Contiguous Float Arrays)
+    return {
+        'expected_value': np.ascontiguousarray(ev, dtype = float),
+        'expected_savings': np.ascontiguousarray(es, dtype = float),
+        'monthly_sales': np.ascontiguousarray(savings_made_purchases, dtype = float),
+        'expected_customers_saved': np.ascontiguousarray(esc, dtype = float)
+    }
+
+#! ---- End Function ---- #
+
+
+# Workflow:
+lead_strategy_calc_expected_value_array(
+    hot_lead_count   = np.array([0, 500, 1000]),
+    cold_lead_count  = np.array([1000, 500, 0]),
+    made_purchases   = np.array([0, 80, 100]),
+    missed_purchases = np.array([100, 20, 0]),
+    customer_conversion_rate = np.array([[0.04], [0.05], [0.06]])
+)
+
+
 
 # -------------------------------------------------------------------------------------------- #
 #                          4.0 OPTIMIZE THE THRESHOLD AND GENERATE A TABLE                     #
 # -------------------------------------------------------------------------------------------- #
+# lead_strategy_sweep_thresholds()
+# Rank once, then aggregate every threshold with a single searchsorted
+
+def lead_strategy_sweep_thresholds(
+    data,
+    thresh      = np.linspace(0, 1, num = 100),
+    thresh_mode = 'grid',
+    gain_curve  = None,
+    verbose     = False
+):
+
+    # `data` should be `lead_scored_df`
+
+    if gain_curve is None:
+
+        # Rank Leads (Single Sort, by position: safe with a duplicated index)
+        made_purchase = data[['Score', 'made_purchase']] \
+            .sort_values('Score', ascending = False)['made_purchase'] \
+            .to_numpy()
+
+        # Cumulative Purchases & Gain
+        cum_purchases = np.concatenate([[0], np.cumsum(made_purchase)])
+        gain          = cum_purchases[1:] / np.sum(made_purchase)
+
+    else:
+
+        # Already Ranked (GainCurve)
+        cum_purchases = gain_curve.cum_purchases
+        gain          = gain_curve.gain
+
+    total_count     = len(gain)
+    total_purchases = cum_purchases[-1]
+
+    # Thresholds: 'grid' uses `thresh`, 'exact' uses every distinct gain breakpoint
+    if thresh_mode == 'exact':
+        thresh_array = np.unique(np.concatenate([[0.0], gain]))
+    else:
+        thresh_array = np.asarray(thresh, dtype = float)
+
+    # Hot-Leads: gain <= thresh (gain is non-decreasing)
+    hot_lead_count = np.searchsorted(gain, thresh_array, side = 'right')
+    made_purchases = cum_purchases[hot_lead_count]
+
+    # Aggregate Results (One Row Per Threshold)
+    sweep_df = pd.DataFrame({
+        'thresh'           : thresh_array,
+        'hot_lead_count'   : hot_lead_count,
+        'cold_lead_count'  : total_count - hot_lead_count,
+        'made_purchases'   : made_purchases,
+        'missed_purchases' : total_purchases - made_purchases
+    })
+
+    # Verbose
+    if verbose:
+        print("===================================================================")
+        print(f"lead_strategy_sweep_thresholds: {len(thresh_array)} thresholds swept!")
+        print("===================================================================")
+
+    # Return
+    return sweep_df
+
+#! ---- End Function ---- #
+
+
+# Workflow:
+lead_strategy_sweep_thresholds(
+    data    = leads_scored_df,
+    thresh  = np.linspace(0, 1, num = 100),
+    verbose = True
+)
+
+lead_strategy_sweep_thresholds(
+    data        = leads_scored_df,
+    thresh_mode = 'exact',
+    verbose     = True
+)
+
+# Duplicated index (e.g. concat without reset_index): ranking is by position, same result
+leads_scored_dup_df = pd.concat([leads_scored_df, leads_scored_df])
+
+pd.testing.assert_frame_equal(
+    lead_strategy_sweep_thresholds(data = leads_scored_dup_df),
+    lead_strategy_sweep_thresholds(data = leads_scored_dup_df.reset_index(drop = True))
+)
+
+
 # lead_strategy_create_thresh_table()
 # Optimize for multiple thresholds
 
 def lead_strategy_create_thresh_table(
 	data,
     thresh                     = np.linspace(0, 1, num = 100),
+    thresh_mode                = 'grid',
 	email_list_size            = 100000,
 	unsub_rate_per_sales_email = 0.005,
 	sales_emails_per_month     = 5,
@@ -241,44 +495,41 @@ def lead_strategy_create_thresh_table(
 	avg_customer_value         = 2000,
 	highlight_max              = True,
 	highlight_max_color        = "green",
+	gain_curve                 = None,
 	verbose                    = False
 ):
 
     # `data` should be `lead_scored_df`
 
-    # Thereshold Table
-    thresh_df = pd.Series(thresh, name = "thresh").to_frame()
-
-    # List Comp
-    #[tup[0] for tup in zip(thresh_df['thresh'])]
-
-    sim_results_list = [
-		lead_make_strategy(
-			data = data,
-			thresh = tup[0],
-			verbose = verbose
-		) \
-			.pipe(
-				lead_aggregate_strategy_results
-    		) \
-			.pipe(
-				lead_strategy_calc_expected_value,
-				email_list_size = email_list_size,
-				unsub_rate_per_sales_email = unsub_rate_per_sales_email,
-				sales_emails_per_month = sales_emails_per_month,
-				avg_sales_per_month = avg_sales_per_month,
-				avg_sales_emails_per_month = avg_sales_emails_per_month,
-				customer_conversion_rate = customer_conversion_rate,
-				avg_customer_value = avg_customer_value,
-				verbose = verbose,
-			)
-		for tup in zip(thresh_df['thresh'])
-	]
-
-    # List to Frame
-    sim_results_df = pd.Series(sim_results_list, name = 'sim_results').to_frame()
+    # Sweep Thresholds (Single Sort)
+    sweep_df = lead_strategy_sweep_thresholds(
+        data        = data,
+        thresh      = thresh,
+        thresh_mode = thresh_mode,
+        gain_curve  = gain_curve,
+        verbose     = verbose
+    )
 
-    sim_results_df = sim_results_df['sim_results'].apply(pd.Series)
+    # Thereshold Table
+    thresh_df = sweep_df[['thresh']]
+
+    # Expected Value (Vectorized Over Thresholds)
+    sim_results_df = pd.DataFrame(
+        lead_strategy_calc_expected_value_array(
+            hot_lead_count = sweep_df['hot_lead_count'].to_numpy(),
+            cold_lead_count = sweep_df['cold_lead_count'].to_numpy(),
+            made_purchases = sweep_df['made_purchases'].to_numpy(),
+            missed_purchases = sweep_df['missed_purchases'].to_numpy(),
+            email_list_size = email_list_size,
+            unsub_rate_per_sales_email = unsub_rate_per_sales_email,
+            sales_emails_per_month = sales_emails_per_month,
+            avg_sales_per_month = avg_sales_per_month,
+            avg_sales_emails_per_month = avg_sales_emails_per_month,
+            customer_conversion_rate = customer_conversion_rate,
+            avg_customer_value = avg_customer_value
+        ),
+        index = thresh_df.index
+    )
 
     thresh_optim_df = pd.concat([thresh_df, sim_results_df], axis = 1)
 
@@ -328,18 +579,14 @@ def lead_select_optimum_thresh(
     except:
         data = data
 
-    # Find Optim
-    _filter_1 = data[optim_col] == data[optim_col].max()
-
     # Find Safeguard
     _filter_2 = data['monthly_sales'] >= monthly_sales_reduction_safe_guard \
         * data['monthly_sales'].max()
 
-    # Test if optim is in the safegard range
-    if (all(_filter_1 + _filter_2 == _filter_2)):
-        _filter = _filter_1
-    else:
-        _filter = _filter_2
+    # Find Optim (best `optim_col` inside the safeguard range)
+    _filter_1 = data[optim_col] == data[optim_col][_filter_2].max()
+
+    _filter = _filter_1 & _filter_2
 
     # Apply Filter
     thresh_selected = data[_filter].head(1)
@@ -534,6 +781,67 @@ lead_plot_optim_thresh(
 )
 
 
+# lead_plot_gain_curve()
+# Gain & lift straight from a GainCurve (no re-sort), down-sampled to `n_points`
+
+def lead_plot_gain_curve(
+    gain_curve,
+    thresh = None,
+    n_points = 1000,
+    fig_title = "Gain & Lift Curve",
+    verbose = False
+):
+
+    # Down-Sample (Keeps The Last Point)
+    idx = np.unique(np.linspace(0, gain_curve.total_count - 1, num = n_points).astype(int))
+
+    curve_df = pd.DataFrame({
+        'pct_leads' : gain_curve.rank[idx] / gain_curve.total_count,
+        'gain'      : gain_curve.gain[idx],
+        'lift'      : gain_curve.lift[idx]
+    }) \
+        .melt(id_vars = 'pct_leads', var_name = 'curve', value_name = 'value')
+
+    # Fig: Gain & Lift
+    fig = px.line(
+        curve_df,
+        x = 'pct_leads',
+        y = 'value',
+        facet_row = 'curve',
+        title = fig_title
+    )
+
+    fig.update_yaxes(matches = None)
+    fig.update_xaxes(tickformat = '.0%')
+
+    # Fig Add Vline (Share Of Leads That Are Hot At `thresh`)
+    if thresh is not None:
+        fig.add_vline(
+            x = gain_curve.hot_lead_count(thresh) / gain_curve.total_count,
+            line_color = 'red',
+            line_dash = 'dash'
+        )
+
+    # Verbose
+    if verbose:
+        print("===================================================================")
+        print("lead_plot_gain_curve: Plot Created!")
+        print("===================================================================")
+
+    # Return
+    return fig
+
+#! ---- End Function ---- #
+
+
+# Workflow
+lead_plot_gain_curve(
+    gain_curve = gain_curve,
+    thresh = 0.90,
+    verbose = True
+)
+
+
 
 # -------------------------------------------------------------------------------------- #
 #                              8.0 MAKE THE OPTIMAL STRATEGY                             #
@@ -547,6 +855,7 @@ def lead_score_strategy_optimization(
     data,
 
     thresh = np.linspace(0, 1, num = 100),
+    thresh_mode = 'grid',
     optim_col = 'expected_value',
 	monthly_sales_reduction_safe_guard = 0.90,
 	for_marketing_team = True,
@@ -560,6 +869,7 @@ def lead_score_strategy_optimization(
 	avg_customer_value = 2000,
 	highlight_max = True,
 	highlight_max_color = "green",
+	gain_curve = None,
 
 	verbose = False
 
@@ -569,6 +879,7 @@ def lead_score_strategy_optimization(
     thresh_optim_df = lead_strategy_create_thresh_table(
 		data = data,
 		thresh = thresh,
+		thresh_mode = thresh_mode,
   		email_list_size = email_list_size,
 		unsub_rate_per_sales_email = unsub_rate_per_sales_email,
 		sales_emails_per_month = sales_emails_per_month,
@@ -578,6 +889,7 @@ def lead_score_strategy_optimization(
 		avg_customer_value = avg_customer_value,
 		highlight_max = highlight_max,
 		highlight_max_color = highlight_max_color,
+		gain_curve = gain_curve,
 		verbose = verbose
 
 	)
@@ -610,6 +922,7 @@ def lead_score_strategy_optimization(
 		data = data,
 		thresh = thresh_optim,
 		for_marketing_team = for_marketing_team,
+		gain_curve = gain_curve,
 		verbose = verbose
 	)
 
@@ -645,6 +958,373 @@ optimization_results_dict['thresh_optim_df']
 
 optimization_results_dict['thresh_plot']
 
+# Exact Optimum (Every Distinct Gain Breakpoint)
+optimization_results_exact_dict = lead_score_strategy_optimization(
+	data = leads_scored_df,
+	thresh_mode = 'exact',
+	monthly_sales_reduction_safe_guard = 0.95,
+	verbose = False
+)
+
+optimization_results_exact_dict['expected_value']
+
+# Exact breakpoints include every grid outcome, so exact EV can't be lower
+assert optimization_results_exact_dict['expected_value']['expected_value'].iloc[0] \
+	>= optimization_results_dict['expected_value']['expected_value'].iloc[0]
+
+# Shared Gain Curve (Rank Once, Reuse For Table + Strategy)
+lead_score_strategy_optimization(
+	data = leads_scored_df,
+	gain_curve = GainCurve.from_scored_leads(leads_scored_df),
+	monthly_sales_reduction_safe_guard = 0.95
+)['expected_value']
+
+
+
+# -------------------------------------------------------------------------------------- #
+#                         9.0 OPTIMIZE MANY WHAT-IF SCENARIOS AT ONCE                    #
+# -------------------------------------------------------------------------------------- #
+#   def lead_score_strategy_simulate_scenarios()
+# - Cartesian product of the business inputs (like cost_simulate_unsub_cost)
+# - One sweep of the ranked leads, EV math broadcast as (scenario x threshold)
+# - Same selection rule as lead_select_optimum_thresh, applied row by row
+
+def lead_score_strategy_simulate_scenarios(
+    data,
+
+    unsub_rate_per_sales_email = [0.001, 0.005],
+    customer_conversion_rate = [0.04, 0.05, 0.06],
+    avg_customer_value = [2000],
+    monthly_sales_reduction_safe_guard = [0.90],
+
+    thresh = np.linspace(0, 1, num = 100),
+    thresh_mode = 'grid',
+    optim_col = 'expected_value',
+
+    email_list_size = 100000,
+    sales_emails_per_month = 5,
+    avg_sales_per_month = 250000,
+    avg_sales_emails_per_month = 5,
+
+    chunk_size = 1000,
+    gain_curve = None,
+    verbose = False
+):
+
+    # -- Parameter Grid -- #
+    parameter_grid_df = pd.DataFrame(
+        list(
+            product(
+                unsub_rate_per_sales_email,
+                customer_conversion_rate,
+                avg_customer_value,
+                monthly_sales_reduction_safe_guard
+            )
+        ),
+        columns = [
+            'unsub_rate_per_sales_email',
+            'customer_conversion_rate',
+            'avg_customer_value',
+            'monthly_sales_reduction_safe_guard'
+        ]
+    )
+
+    # -- Sweep Thresholds Once -- #
+    sweep_df = lead_strategy_sweep_thresholds(
+        data        = data,
+        thresh      = thresh,
+        thresh_mode = thresh_mode,
+        gain_curve  = gain_curve,
+        verbose     = verbose
+    )
+
+    thresh_array = sweep_df['thresh'].to_numpy()
+
+    # -- Broadcast EV Math & Select Optimum (Chunks Of Scenarios) -- #
+    optim_results_list = []
+
+    for start in range(0, len(parameter_grid_df), chunk_size):
+
+        grid_chunk_df = parameter_grid_df.iloc[start:start + chunk_size]
+
+        ev_dict = lead_strategy_calc_expected_value_array(
+            hot_lead_count = sweep_df['hot_lead_count'].to_numpy(),
+            cold_lead_count = sweep_df['cold_lead_count'].to_numpy(),
+            made_purchases = sweep_df['made_purchases'].to_numpy(),
+            missed_purchases = sweep_df['missed_purchases'].to_numpy(),
+            email_list_size = email_list_size,
+            unsub_rate_per_sales_email = grid_chunk_df[['unsub_rate_per_sales_email']].to_numpy(),
+            sales_emails_per_month = sales_emails_per_month,
+            avg_sales_per_month = avg_sales_per_month,
+            avg_sales_emails_per_month = avg_sales_emails_per_month,
+            customer_conversion_rate = grid_chunk_df[['customer_conversion_rate']].to_numpy(),
+            avg_customer_value = grid_chunk_df[['avg_customer_value']].to_numpy()
+        )
+
+        # Find Safeguard
+        monthly_sales_array = ev_dict['monthly_sales']
+        _filter_2 = monthly_sales_array >= grid_chunk_df[['monthly_sales_reduction_safe_guard']].to_numpy() \
+            * np.nanmax(monthly_sales_array, axis = 1, keepdims = True)
+
+        # Find Optim (best `optim_col` inside the safeguard range, per scenario)
+        optim_array = np.where(_filter_2, ev_dict[optim_col], -np.inf)
+        _filter_1 = optim_array == np.max(optim_array, axis = 1, keepdims = True)
+
+        _filter = _filter_1 & _filter_2
+
+        # First Selected Threshold Per Scenario
+        idx = np.argmax(_filter, axis = 1)
+        rows = np.arange(len(idx))
+
+        optim_results_list.append(
+            pd.DataFrame({
+                'thresh': thresh_array[idx],
+                **{key: value[rows, idx] for key, value in ev_dict.items()}
+            })
+        )
+
+    simulation_results_df = pd.concat(
+        [parameter_grid_df, pd.concat(optim_results_list, axis = 0, ignore_index = True)],
+        axis = 1
+    )
+
+    # Verbose
+    if verbose:
+        print("===================================================================")
+        print(f"lead_score_strategy_simulate_scenarios: {len(parameter_grid_df)} scenarios optimized!")
+        print("===================================================================")
+
+    # Return
+    return simulation_results_df
+
+#! ---- End Function ---- #
+
+
+# Workflow
+lead_score_strategy_simulate_scenarios(
+	data = leads_scored_df,
+	unsub_rate_per_sales_email = np.linspace(0.001, 0.01, num = 10),
+	customer_conversion_rate = np.linspace(0.02, 0.08, num = 10),
+	avg_customer_value = np.linspace(1000, 3000, num = 10),
+	monthly_sales_reduction_safe_guard = np.linspace(0.80, 0.99, num = 10),
+	verbose = True
+)
+
+
+
+# -------------------------------------------------------------------------------------- #
+#                          10.0 PULL THE TOP HOT LEADS (TOP-K)                            #
+# -------------------------------------------------------------------------------------- #
+# - Campaign pulls: the hottest `n` leads and/or the leads under a gain cutoff
+# - No full sort: argpartition finds the top-n block, the gain cutoff only sorts the
+#   purchasers, then just the selected block is sorted
+# - Same ranking as GainCurve (float32 score descending, ties in input order)
+
+def _lead_top_n_index(score, position, n):
+
+    neg_score = -score
+
+    if n <= 0:
+        idx = np.arange(0)
+    elif n >= len(neg_score):
+        idx = np.arange(len(neg_score))
+    else:
+        # n-th Best Score, Then Fill Its Ties In Input Order
+        kth = neg_score[np.argpartition(neg_score, n - 1)[n - 1]]
+
+        above = np.flatnonzero(neg_score < kth)
+        ties  = np.flatnonzero(neg_score == kth)
+        ties  = ties[np.argsort(position[ties], kind = 'stable')][:n - len(above)]
+
+        idx = np.concatenate([above, ties])
+
+    # Small Sort Of The Selected Block
+    return idx[np.lexsort((position[idx], neg_score[idx]))]
+
+
+def _lead_gain_cutoff(purchase_score, purchase_position, gain_thresh):
+
+    total_purchases = len(purchase_score)
+
+    # Purchasers allowed before gain > thresh (same float math as cum / total)
+    n_allowed = np.searchsorted(np.arange(1, total_purchases + 1) / total_purchases, gain_thresh, side = 'right')
+
+    if n_allowed >= total_purchases:
+        return None
+
+    # First purchaser past the cutoff (sorts the purchasers only)
+    order = np.lexsort((purchase_position, -purchase_score))
+    cutoff = order[n_allowed]
+
+    return purchase_score[cutoff], purchase_position[cutoff]
+
+
+def _lead_is_hot(score, position, cutoff):
+
+    # Hot-Lead: ranked before the cutoff purchaser
+    if cutoff is None:
+        return np.ones(len(score), dtype = bool)
+
+    cutoff_score, cutoff_position = cutoff
+
+    return (score > cutoff_score) | ((score == cutoff_score) & (position < cutoff_position))
+
+
+# lead_select_top_leads()
+
+def lead_select_top_leads(
+    data,
+    n = None,
+    gain_thresh = None,
+    verbose = False
+):
+
+    # `data` should be `leads_scored_df`
+    score    = data['Score'].to_numpy(dtype = np.float32)
+    position = np.arange(len(score))
+
+    idx = position
+
+    # Gain Cutoff
+    if gain_thresh is not None:
+        purchased = data['made_purchase'].to_numpy() == 1
+
+        if purchased.sum() == 0:
+            idx = idx[:0]
+        else:
+            cutoff = _lead_gain_cutoff(score[purchased], position[purchased], gain_thresh)
+            idx = np.flatnonzero(_lead_is_hot(score, position, cutoff))
+
+    # Top-n (Or Sort The Hot Block)
+    idx = idx[_lead_top_n_index(score[idx], position[idx], len(idx) if n is None else n)]
+
+    top_leads_df = data \
+        .iloc[idx] \
+        .assign(rank = np.arange(1, len(idx) + 1))
+
+    # Verbose
+    if verbose:
+        print("===================================================================")
+        print(f"lead_select_top_leads: {len(top_leads_df)} hot leads selected!")
+        print("===================================================================")
+
+    # Return
+    return top_leads_df
+
+#! ---- End Function ---- #
+
+
+# Workflow
+lead_select_top_leads(
+    data = leads_scored_df,
+    n = 1000,
+    verbose = True
+)
+
+lead_select_top_leads(
+    data = leads_scored_df,
+    gain_thresh = 0.90,
+    verbose = True
+)
+
+
+# lead_select_top_leads_chunked()
+# - `chunks`: function returning a fresh iterator of scored-lead frames,
+#   e.g. lambda: pd.read_csv("scores.csv", chunksize = 100000)
+# - Called twice with `gain_thresh` (pass 1 collects the purchasers only)
+# - Memory: one chunk + the current top-n (or the hot leads found so far)
+
+def lead_select_top_leads_chunked(
+    chunks,
+    n = None,
+    gain_thresh = None,
+    verbose = False
+):
+
+    # Pass 1: Gain Cutoff From The Purchasers
+    cutoff = None
+
+    if gain_thresh is not None:
+        purchase_score_list, purchase_position_list = [], []
+
+        offset = 0
+        for chunk_df in chunks():
+            purchased = chunk_df['made_purchase'].to_numpy() == 1
+
+            purchase_score_list.append(chunk_df['Score'].to_numpy(dtype = np.float32)[purchased])
+            purchase_position_list.append(offset + np.flatnonzero(purchased))
+
+            offset += len(chunk_df)
+
+        purchase_score = np.concatenate(purchase_score_list)
+
+        if len(purchase_score) == 0:
+            return pd.DataFrame()
+
+        cutoff = _lead_gain_cutoff(purchase_score, np.concatenate(purchase_position_list), gain_thresh)
+
+    # Pass 2: Keep Hot Leads / Running Top-n
+    selected_list = []
+
+    offset = 0
+    for chunk_df in chunks():
+
+        score    = chunk_df['Score'].to_numpy(dtype = np.float32)
+        position = offset + np.arange(len(chunk_df))
+
+        offset += len(chunk_df)
+
+        keep = np.ones(len(chunk_df), dtype = bool)
+        if gain_thresh is not None:
+            keep = _lead_is_hot(score, position, cutoff)
+
+        selected_list.append(chunk_df.iloc[np.flatnonzero(keep)].assign(_position = position[keep]))
+
+        # Running Top-n: never hold more than n + one chunk
+        if n is not None:
+            selected_df = pd.concat(selected_list, axis = 0)
+
+            idx = _lead_top_n_index(
+                selected_df['Score'].to_numpy(dtype = np.float32),
+                selected_df['_position'].to_numpy(),
+                n
+            )
+
+            selected_list = [selected_df.iloc[idx]]
+
+    selected_df = pd.concat(selected_list, axis = 0)
+
+    # Final Order & Rank
+    idx = _lead_top_n_index(
+        selected_df['Score'].to_numpy(dtype = np.float32),
+        selected_df['_position'].to_numpy(),
+        len(selected_df)
+    )
+
+    top_leads_df = selected_df \
+        .iloc[idx] \
+        .drop('_position', axis = 1) \
+        .assign(rank = np.arange(1, len(idx) + 1))
+
+    # Verbose
+    if verbose:
+        print("===================================================================")
+        print(f"lead_select_top_leads_chunked: {len(top_leads_df)} hot leads selected!")
+        print("===================================================================")
+
+    # Return
+    return top_leads_df
+
+#! ---- End Function ---- #
+
+
+# Workflow
+lead_select_top_leads_chunked(
+    chunks = lambda: (leads_scored_df.iloc[i:i + 5000] for i in range(0, len(leads_scored_df), 5000)),
+    n = 1000,
+    verbose = True
+)
+
 
 
 # CONCLUSIONS ----
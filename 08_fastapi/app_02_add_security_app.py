@@ -10,6 +10,10 @@
 # - Navigate to localhost:8000
 # - Navigate to localhost:8000/docs
 # - Shutdown App: Ctrl/Cmd + C
+#
+# Several Workers (leads + model loaded once, shared copy-on-write):
+# - ELS_PRELOAD_APP=1 gunicorn 08_fastapi.app_02_add_security_app:app --preload -w 4 -k uvicorn.workers.UvicornWorker
+# - Readiness: localhost:8000/ready
 
 
 # -------------------------------------------------------------------------------------- #
@@ -24,15 +28,34 @@
 
 # Core ----
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+import io
 import json
+import hashlib
+import tempfile
+from typing import Optional
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import email_lead_scoring as els
 
+# Columnar Payloads ----
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Concurrency ----
+import os
+import gc
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 # Security ----
 from fastapi import Depends, HTTPException
 from fastapi.security import APIKeyHeader
-from starlette.status import HTTP_403_FORBIDDEN
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_503_SERVICE_UNAVAILABLE
 
 # -------------------------------------------------------------------------------------- #
 #                                        SECURITY                                        #
@@ -63,10 +86,530 @@ async def get_api_key(api_key: str = Depends(api_key_header)):
 # -------------------------------------------------------------------------------------- #
 app = FastAPI()
 
+# -------------------------------------------------------------------------------------- #
+#                                      WORKER POOL                                       #
+# -------------------------------------------------------------------------------------- #
+# - Parsing, scoring and optimization are CPU bound: run them off the event loop
+# - Threads (not processes): the cached model and leads are shared, xgboost/numpy release the GIL
+# - Backpressure: at most WORKER_QUEUE_DEPTH jobs running + waiting, then 503 + Retry-After
+#   (wait_in_worker_pool waits for a slot instead, for work that can't be retried cheaply)
+# - Created at startup and shut down at shutdown, so each app lifecycle gets a fresh pool
+WORKER_POOL_SIZE   = int(os.environ.get("ELS_WORKER_POOL_SIZE", os.cpu_count() or 1))
+WORKER_QUEUE_DEPTH = int(os.environ.get("ELS_WORKER_QUEUE_DEPTH", 4 * WORKER_POOL_SIZE))
+
+worker_pool  = None
+worker_slots = None
+
+async def run_in_worker_pool(func, *args, **kwargs):
+
+    if worker_slots.locked():
+        raise HTTPException(
+            status_code = HTTP_503_SERVICE_UNAVAILABLE,
+            detail      = "Scoring queue is full, retry later",
+            headers     = {"Retry-After": "1"}
+        )
+
+    return await wait_in_worker_pool(func, *args, **kwargs)
+
+
+async def wait_in_worker_pool(func, *args, **kwargs):
+
+    async with worker_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(worker_pool, functools.partial(func, *args, **kwargs))
+
+
+@app.on_event("startup")
+async def startup_worker_pool():
+    global worker_pool, worker_slots
+
+    worker_pool = ThreadPoolExecutor(
+        max_workers        = WORKER_POOL_SIZE,
+        thread_name_prefix = "els-worker"
+    )
+
+    worker_slots = asyncio.Semaphore(WORKER_QUEUE_DEPTH)
+
+
+@app.on_event("shutdown")
+def shutdown_worker_pool():
+    global worker_pool
+
+    worker_pool.shutdown(wait=False)
+    worker_pool = None
+
+
+# -------------------------------------------------------------------------------------- #
+#                                      WORKER JOBS                                       #
+# -------------------------------------------------------------------------------------- #
+# Plain (sync) functions: these run inside the worker pool
+MODEL_PATH = "models/pycaret/xgb_model_single_tuned_finalized"
+
+# Payload formats
+# - JSON (default): body is the JSON string of df.to_json(), as before
+# - Arrow IPC stream / Parquet: raw bytes, chosen by Content-Type (requests) and Accept (responses)
+JSON_MEDIA_TYPE    = "application/json"
+ARROW_MEDIA_TYPE   = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+def get_media_type(header_value):
+
+    # "application/json; charset=utf-8" -> "application/json"
+    media_type = (header_value or "").split(";")[0].strip().lower()
+
+    if media_type in (ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE):
+        return media_type
+
+    return JSON_MEDIA_TYPE
+
+
+def negotiate_media_type(accept):
+
+    for media_type in (ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE):
+        if media_type in (accept or ""):
+            return media_type
+
+    return JSON_MEDIA_TYPE
+
+
+def read_leads_json(request_body):
+
+    data_json = json.loads(request_body)
+    leads_df = pd.read_json(data_json)
+
+    return leads_df
+
+
+def read_leads_body(request_body, media_type=JSON_MEDIA_TYPE):
+
+    if media_type == ARROW_MEDIA_TYPE:
+        table = pa.ipc.open_stream(pa.py_buffer(request_body)).read_all()
+    elif media_type == PARQUET_MEDIA_TYPE:
+        table = pq.read_table(pa.BufferReader(request_body))
+    else:
+        return read_leads_json(request_body)
+
+    # One block per column, Arrow buffers released as they are converted
+    leads_df = table.to_pandas(split_blocks=True, self_destruct=True)
+
+    return leads_df
+
+
+def write_leads_body(data, media_type=ARROW_MEDIA_TYPE):
+
+    table = pa.Table.from_pandas(data)
+    sink = pa.BufferOutputStream()
+
+    if media_type == PARQUET_MEDIA_TYPE:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+# -------------------------------------------------------------------------------------- #
+#                         LEAD STRATEGY CACHE (/calculate_lead_strategy)                 #
+# -------------------------------------------------------------------------------------- #
+# - Same upload re-posted (e.g. moving the safeguard slider): no re-parse, no re-score
+# - Scored leads keyed by a hash of the raw body, threshold tables by body hash + business
+#   params (everything except the safeguard, which only picks the row from the table)
+# - LRU, bounded by total cached rows (scored leads) and entries (threshold tables)
+SCORED_LEADS_CACHE_MAX_ROWS   = int(os.environ.get("ELS_SCORED_LEADS_CACHE_MAX_ROWS", 1000000))
+THRESH_TABLE_CACHE_MAX_SIZE   = 256
+
+scored_leads_cache = OrderedDict()
+thresh_table_cache = OrderedDict()
+
+lead_strategy_cache_lock = threading.Lock()
+
+def lead_strategy_cache_get(cache, key):
+
+    with lead_strategy_cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+    return None
+
+
+def lead_strategy_cache_put(cache, key, value, max_size, size_of=lambda value: 1):
+
+    with lead_strategy_cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+
+        # Keep the newest entry even when it alone is over the limit
+        while len(cache) > 1 and sum(size_of(v) for v in cache.values()) > max_size:
+            cache.popitem(last=False)
+
+
+def lead_strategy_cache_clear():
+
+    with lead_strategy_cache_lock:
+        scored_leads_cache.clear()
+        thresh_table_cache.clear()
+
+
+def calculate_lead_strategy_job(request_body, media_type=JSON_MEDIA_TYPE, **params):
+
+    safe_guard = params.pop("monthly_sales_reduction_safe_guard")
+
+    # Scored Leads (cached by upload)
+    leads_key = (media_type, hashlib.blake2b(request_body, digest_size=16).hexdigest())
+
+    leads_scored_df = lead_strategy_cache_get(scored_leads_cache, leads_key)
+
+    if leads_scored_df is None:
+        leads_df = read_leads_body(request_body, media_type)
+
+        leads_scored_df = els.model_score_leads(
+            data       = leads_df,
+            model_path = MODEL_PATH
+        )
+
+        lead_strategy_cache_put(
+            scored_leads_cache, leads_key, leads_scored_df,
+            max_size = SCORED_LEADS_CACHE_MAX_ROWS,
+            size_of  = len
+        )
+
+    # Threshold Table (cached by upload + business params)
+    thresh_key = (leads_key, tuple(sorted(params.items())))
+
+    thresh_optim_df = lead_strategy_cache_get(thresh_table_cache, thresh_key)
+
+    if thresh_optim_df is None:
+        thresh_optim_df = els.lead_strategy_create_thresh_table(
+            data          = leads_scored_df,
+            highlight_max = False,
+            **params
+        )
+
+        lead_strategy_cache_put(
+            thresh_table_cache, thresh_key, thresh_optim_df,
+            max_size = THRESH_TABLE_CACHE_MAX_SIZE
+        )
+
+    # Safeguard -> Threshold -> Strategy (cheap, not cached)
+    thresh_optim = els.lead_select_optimum_thresh(
+        data                               = thresh_optim_df,
+        monthly_sales_reduction_safe_guard = safe_guard
+    )
+
+    expected_value = els.lead_get_expected_value(
+        data      = thresh_optim_df,
+        threshold = thresh_optim
+    )
+
+    lead_strategy_df = els.lead_make_strategy(
+        data               = leads_scored_df,
+        thresh             = thresh_optim,
+        for_marketing_team = True
+    )
+
+    results = {
+        'lead_strategy': lead_strategy_df.to_json(),
+        'expected_value': expected_value.to_json(),
+        'thresh_optim_table': thresh_optim_df.to_json()
+        #'thresh_plot': optimization_results['tresh_plot']
+    }
+
+    return results
+
+
+# -------------------------------------------------------------------------------------- #
+#                                MICRO-BATCHING (/predict)                               #
+# -------------------------------------------------------------------------------------- #
+# - Concurrent /predict calls are queued and coalesced into one model call
+# - A batch closes at PREDICT_BATCH_MAX_ROWS rows or PREDICT_BATCH_MAX_WAIT seconds
+# - Requests at least PREDICT_BATCH_MAX_ROWS long skip the queue (already a big batch)
+# - Small bodies (single CRM webhook leads) are parsed inline, a pool hop costs more than the parse
+# - A closed batch waits for a worker slot, requests arriving meanwhile join it (bigger batches
+#   under load instead of 503s); backpressure is at enqueue: 503 once PREDICT_QUEUE_DEPTH wait
+# - A failed batch is re-scored request by request, so only the bad request gets the error
+# - Queue + batcher task are created at startup (bound to the serving loop), cancelled at shutdown
+PREDICT_BATCH_MAX_ROWS = int(os.environ.get("ELS_PREDICT_BATCH_MAX_ROWS", 1024))
+PREDICT_BATCH_MAX_WAIT = float(os.environ.get("ELS_PREDICT_BATCH_MAX_WAIT", 0.005))
+PREDICT_QUEUE_DEPTH    = int(os.environ.get("ELS_PREDICT_QUEUE_DEPTH", PREDICT_BATCH_MAX_ROWS))
+PREDICT_INLINE_PARSE_MAX_BYTES = 64 * 1024
+
+predict_batch_queue  = None
+predict_batcher_task = None
+
+# Strong references to in-flight scoring tasks (the loop only keeps weak ones)
+predict_batch_tasks = set()
+
+# Reported by /ready: requests / batches > 1 means calls are sharing model calls
+PREDICT_BATCH_STATS = dict(batches=0, requests=0)
+
+def score_batch_job(frames):
+
+    # Frames with different columns can't share a model call
+    groups = {}
+    for i, df in enumerate(frames):
+        groups.setdefault(tuple(df.columns), []).append(i)
+
+    scores = [None] * len(frames)
+
+    for positions in groups.values():
+
+        batch_df = pd.concat([frames[i] for i in positions], ignore_index=True)
+
+        batch_scores = els.model_score_leads(
+            data       = batch_df,
+            model_path = MODEL_PATH
+        )['Score'].to_numpy()
+
+        # Fan the scores back out, keyed by each request's own index
+        start = 0
+        for i in positions:
+            stop = start + len(frames[i])
+            scores[i] = {'Score': dict(zip(frames[i].index.tolist(), batch_scores[start:stop].tolist()))}
+            start = stop
+
+    return scores
+
+
+def score_batch_isolated_job(frames):
+
+    # (score, error) per frame: one model call, or one per frame if the batch fails
+    try:
+        return [(score, None) for score in score_batch_job(frames)]
+    except Exception as e:
+        if len(frames) == 1:
+            return [(None, e)]
+
+    results = []
+    for df in frames:
+        try:
+            results.append((score_batch_job([df])[0], None))
+        except Exception as e:
+            results.append((None, e))
+
+    return results
+
+
+async def score_predict_batch(batch):
+
+    # Runs on the worker slot the batcher acquired for this batch
+    try:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(worker_pool, score_batch_isolated_job, [df for df, _ in batch])
+    except Exception as e:
+        results = [(None, e)] * len(batch)
+    finally:
+        worker_slots.release()
+
+    for (_, future), (score, error) in zip(batch, results):
+        if future.done():
+            continue
+        if error is None:
+            future.set_result(score)
+        else:
+            future.set_exception(error)
+
+
+async def predict_batcher():
+
+    loop = asyncio.get_running_loop()
+
+    batch = []
+
+    try:
+        while True:
+
+            batch = [await predict_batch_queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + PREDICT_BATCH_MAX_WAIT
+
+            while n_rows < PREDICT_BATCH_MAX_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(predict_batch_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            # Wait for a free worker slot, then take everything that queued up meanwhile
+            await worker_slots.acquire()
+
+            while n_rows < PREDICT_BATCH_MAX_ROWS and not predict_batch_queue.empty():
+                item = predict_batch_queue.get_nowait()
+                batch.append(item)
+                n_rows += len(item[0])
+
+            PREDICT_BATCH_STATS["batches"] += 1
+            PREDICT_BATCH_STATS["requests"] += len(batch)
+
+            # Score in the background so the next batch can start collecting
+            task = asyncio.ensure_future(score_predict_batch(batch))
+            predict_batch_tasks.add(task)
+            task.add_done_callback(predict_batch_tasks.discard)
+            batch = []
+
+    except asyncio.CancelledError:
+        # Shutdown: the batch being collected won't be scored
+        for _, future in batch:
+            future.cancel()
+        raise
+
+
+async def predict_batched(leads_df):
+
+    if len(leads_df) >= PREDICT_BATCH_MAX_ROWS:
+        scores = await run_in_worker_pool(score_batch_job, [leads_df])
+        return scores[0]
+
+    future = asyncio.get_running_loop().create_future()
+
+    try:
+        predict_batch_queue.put_nowait((leads_df, future))
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code = HTTP_503_SERVICE_UNAVAILABLE,
+            detail      = "Scoring queue is full, retry later",
+            headers     = {"Retry-After": "1"}
+        )
+
+    return await future
+
+
+@app.on_event("startup")
+async def startup_predict_batcher():
+    global predict_batch_queue, predict_batcher_task
+
+    predict_batch_queue  = asyncio.Queue(maxsize=PREDICT_QUEUE_DEPTH)
+    predict_batcher_task = asyncio.ensure_future(predict_batcher())
+
+
+@app.on_event("shutdown")
+async def shutdown_predict_batcher():
+    global predict_batch_queue, predict_batcher_task
+
+    # Stop collecting, let the batches already handed to the pool finish
+    predict_batcher_task.cancel()
+
+    await asyncio.gather(predict_batcher_task, *predict_batch_tasks, return_exceptions=True)
+
+    # Requests still waiting in the queue won't be scored
+    while not predict_batch_queue.empty():
+        _, future = predict_batch_queue.get_nowait()
+        future.cancel()
+
+    predict_batch_queue  = None
+    predict_batcher_task = None
+
+
 # -------------------------------------------------------------------------------------- #
 #                                          DATA                                          #
 # -------------------------------------------------------------------------------------- #
-leads_df = els.db_read_and_process_els_data()
+# - Leads + model are loaded once per process, not per request
+# - gunicorn --preload + ELS_PRELOAD_APP=1: loaded in the master before the fork and shared
+#   copy-on-write by the workers
+# - gc.freeze (pre-fork path only, undone by /refresh_data) keeps the collector's passes off
+#   those pages, but any touch of a Python object (refcount update) still copies its page:
+#   string (object) columns are stored as categoricals, so filters run on numpy codes and
+#   only the strings of the rows a page returns get touched
+# - Otherwise warmed up in the background at startup, /ready reports when it's done
+APP_STATE = dict(
+    leads_df         = None,
+    data_version     = None,
+    subscriber_order = None,
+    subscriber_ids   = None,
+    ready            = False,
+    warmup           = None,
+    warmup_seconds   = None
+)
+
+def data_fingerprint(data):
+
+    # Fast content hash (vectorized per-row hashes), same data -> same fingerprint
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+
+    h = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    h.update(",".join(map(str, data.columns)).encode("utf-8"))
+
+    return h.hexdigest()
+
+
+def preload_app_state():
+
+    start = time.time()
+
+    leads_df = els.db_read_and_process_els_data()
+
+    # Object columns -> categorical (pandas 1.1.5 has no Arrow-backed string dtype)
+    leads_df = leads_df.astype({col: "category" for col in leads_df.select_dtypes("object").columns})
+
+    # Model into the process-wide cache, model_score_leads(use_cache=True) reuses it
+    els.model_load_cached(MODEL_PATH)
+
+    # Keyset pagination: row order by mailchimp_id + the sorted ids (cursor lookups)
+    subscriber_order = np.argsort(leads_df["mailchimp_id"].to_numpy(), kind="stable")
+
+    APP_STATE.update(
+        leads_df         = leads_df,
+        data_version     = data_fingerprint(leads_df),
+        subscriber_order = subscriber_order,
+        subscriber_ids   = leads_df["mailchimp_id"].to_numpy()[subscriber_order],
+        ready            = True,
+        warmup_seconds   = round(time.time() - start, 3)
+    )
+
+    return APP_STATE
+
+
+if os.environ.get("ELS_PRELOAD_APP", "0") == "1":
+    preload_app_state()
+
+    # Pre-fork only: everything loaded so far is long-lived, move it out of the collector's way
+    gc.freeze()
+
+
+@app.on_event("startup")
+async def warmup_app_state():
+
+    # Serve /ready (503) while loading instead of blocking startup
+    if not APP_STATE["ready"]:
+        APP_STATE["warmup"] = asyncio.get_running_loop().run_in_executor(worker_pool, preload_app_state)
+
+
+def get_leads_df():
+
+    if not APP_STATE["ready"]:
+        raise HTTPException(
+            status_code = HTTP_503_SERVICE_UNAVAILABLE,
+            detail      = "Warming up, retry later",
+            headers     = {"Retry-After": "1"}
+        )
+
+    return APP_STATE["leads_df"]
+
+
+@app.get("/ready")
+async def ready():
+
+    if APP_STATE["ready"]:
+        return JSONResponse({
+            "ready"          : True,
+            "leads"          : len(APP_STATE["leads_df"]),
+            "warmup_seconds" : APP_STATE["warmup_seconds"],
+            "predict_batches"  : PREDICT_BATCH_STATS["batches"],
+            "predict_requests" : PREDICT_BATCH_STATS["requests"]
+        })
+
+    warmup = APP_STATE["warmup"]
+
+    detail = "warming up"
+    if warmup is not None and warmup.done() and warmup.exception() is not None:
+        detail = f"warmup failed: {warmup.exception()}"
+
+    return JSONResponse({"ready": False, "detail": detail}, status_code=HTTP_503_SERVICE_UNAVAILABLE)
 
 
 # -------------------------------------------------------------------------------------- #
@@ -124,12 +667,134 @@ async def main():
 # -------------------------------------------------------------------------------------- #
 #                1.0 GET: EXPOSE THE EMAIL SUBSCRIBER DATA AS AN ENDPOINT                #
 # -------------------------------------------------------------------------------------- #
+# - Pages ordered by mailchimp_id: pass next_cursor back as `cursor` for the next page
+# - columns: comma separated projection, country_code: comma separated list
+# - optin window: optin_start inclusive, optin_end exclusive (tz-aware bounds compared in UTC)
+# - Serialized pages cached per data version (a refresh changes the version) + ETag / 304
+SUBSCRIBER_PAGE_MAX_LIMIT      = 10000
+SUBSCRIBER_PAGE_CACHE_MAX_SIZE = 256
+
+subscriber_page_cache = OrderedDict()
+
+def email_subscribers_page_job(leads_df, order, sorted_ids, cursor, limit, columns, country_code,
+                               min_member_rating, optin_start, optin_end):
+
+    # Filters (vectorized over the full frame, no copies)
+    mask = np.ones(len(leads_df), dtype=bool)
+
+    if country_code:
+        mask &= leads_df["country_code"].isin(country_code).to_numpy()
+    if min_member_rating is not None:
+        mask &= leads_df["member_rating"].to_numpy() >= min_member_rating
+    if optin_start is not None:
+        mask &= (leads_df["optin_time"] >= optin_start).to_numpy()
+    if optin_end is not None:
+        mask &= (leads_df["optin_time"] < optin_end).to_numpy()
+
+    # Cursor: rows after the last mailchimp_id already served
+    start = 0
+    if cursor is not None:
+        start = np.searchsorted(sorted_ids, cursor, side="right")
+
+    positions = order[start:]
+    positions = positions[mask[positions]][:limit + 1]
+
+    page_df = leads_df.iloc[positions[:limit]]
+    if columns:
+        page_df = page_df[columns]
+
+    next_cursor = int(leads_df["mailchimp_id"].iloc[positions[limit - 1]]) if len(positions) > limit else None
+
+    # Records JSON written once, not re-encoded by JSONResponse
+    body = '{"data":' + page_df.to_json(orient="records", date_format="iso") \
+        + ',"count":' + str(len(page_df)) \
+        + ',"next_cursor":' + json.dumps(next_cursor) + '}'
+
+    body = body.encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    return etag, body
+
+
 @app.get("/get_email_subscribers", dependencies=[Depends(get_api_key)])
-async def get_email_subscribers():
+async def get_email_subscribers(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: int = 1000,
+    columns: Optional[str] = None,
+    country_code: Optional[str] = None,
+    min_member_rating: Optional[int] = None,
+    optin_start: Optional[str] = None,
+    optin_end: Optional[str] = None
+):
 
-    json = leads_df.to_json()
+    get_leads_df()
+
+    # One snapshot: a concurrent /refresh_data swaps leads, order and version together
+    state    = dict(APP_STATE)
+    leads_df = state["leads_df"]
+
+    # Normalize the query
+    limit = max(1, min(limit, SUBSCRIBER_PAGE_MAX_LIMIT))
+    columns = [col.strip() for col in columns.split(",") if col.strip()] if columns else []
+    country_code = sorted({code.strip().upper() for code in country_code.split(",") if code.strip()}) \
+        if country_code else []
+
+    missing = [col for col in columns if col not in leads_df.columns]
+    if missing:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Unknown columns: {missing}")
+
+    try:
+        optin_start = pd.Timestamp(optin_start) if optin_start else None
+        optin_end = pd.Timestamp(optin_end) if optin_end else None
+    except ValueError as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Invalid optin window: {e}")
+
+    # optin_time is tz-naive: compare tz-aware bounds as naive UTC
+    optin_start, optin_end = [
+        ts.tz_convert(None) if ts is not None and ts.tz is not None else ts
+        for ts in (optin_start, optin_end)
+    ]
+
+    key = (
+        state["data_version"], cursor, limit, tuple(columns), tuple(country_code),
+        min_member_rating, optin_start, optin_end
+    )
 
-    return JSONResponse(json)
+    # Page cache (LRU)
+    if key in subscriber_page_cache:
+        subscriber_page_cache.move_to_end(key)
+        etag, body = subscriber_page_cache[key]
+    else:
+        etag, body = await run_in_worker_pool(
+            email_subscribers_page_job,
+            leads_df, state["subscriber_order"], state["subscriber_ids"], cursor, limit, columns, country_code, min_member_rating, optin_start, optin_end
+        )
+        subscriber_page_cache[key] = (etag, body)
+        while len(subscriber_page_cache) > SUBSCRIBER_PAGE_CACHE_MAX_SIZE:
+            subscriber_page_cache.popitem(last=False)
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.post("/refresh_data", dependencies=[Depends(get_api_key)])
+async def refresh_data():
+
+    # Reload leads + model, new data version -> old pages can't be served again
+    await run_in_worker_pool(preload_app_state)
+
+    # The pre-fork (frozen) objects were just replaced: let the collector reclaim them
+    gc.unfreeze()
+
+    subscriber_page_cache.clear()
+    lead_strategy_cache_clear()
+
+    return JSONResponse({"data_version": APP_STATE["data_version"], "leads": len(APP_STATE["leads_df"])})
 
 
 # -------------------------------------------------------------------------------------- #
@@ -142,8 +807,14 @@ async def data(request: Request, dependencies=[Depends(get_api_key)]):
 
     # print(request_body)
 
-    data_json = json.loads(request_body)
-    leads_df = pd.read_json(data_json)
+    media_type = get_media_type(request.headers.get("content-type"))
+    leads_df = await run_in_worker_pool(read_leads_body, request_body, media_type)
+
+    # Arrow / Parquet back when the client asks for it
+    response_type = negotiate_media_type(request.headers.get("accept"))
+    if response_type != JSON_MEDIA_TYPE:
+        content = await run_in_worker_pool(write_leads_body, leads_df, response_type)
+        return Response(content=content, media_type=response_type)
 
     # print(leads_df)
     leads_json = leads_df.to_json()
@@ -157,24 +828,27 @@ async def data(request: Request, dependencies=[Depends(get_api_key)]):
 @app.post("/predict", dependencies=[Depends(get_api_key)])
 async def predict(request: Request):
 
-    # Handle Incoming JSON Request
+    # Handle Incoming Request (JSON, Arrow IPC or Parquet)
     request_body = await request.body()
-    data_json = json.loads(request_body)
-    leads_df = pd.read_json(data_json)
-
-    # Load Model
-    leads_scored_df = els.model_score_leads(
-        data       = leads_df,
-        model_path = "models/pycaret/xgb_model_single_tuned_finalized"
-    )
+    media_type = get_media_type(request.headers.get("content-type"))
 
-    # print(leads_scored_df)
+    # Parse (inline when small, worker pool otherwise)
+    if len(request_body) <= PREDICT_INLINE_PARSE_MAX_BYTES:
+        leads_df = read_leads_body(request_body, media_type)
+    else:
+        leads_df = await run_in_worker_pool(read_leads_body, request_body, media_type)
 
-    # Convert to JSON
-    scores = leads_scored_df[['Score']].to_dict()
+    # Score + Convert to JSON (micro-batched with other concurrent requests)
+    scores = await predict_batched(leads_df)
 
     #print(scores)
 
+    # Arrow / Parquet back when the client asks for it
+    response_type = negotiate_media_type(request.headers.get("accept"))
+    if response_type != JSON_MEDIA_TYPE:
+        content = await run_in_worker_pool(write_leads_body, pd.DataFrame(scores), response_type)
+        return Response(content=content, media_type=response_type)
+
     # Return
     return JSONResponse(scores)
 
@@ -198,20 +872,15 @@ async def calculate_lead_strategy(
 
 ):
 
-    # Handle Incoming JSON Request
+    # Handle Incoming Request (JSON, Arrow IPC or Parquet)
     request_body = await request.body()
-    data_json = json.loads(request_body)
-    leads_df = pd.read_json(data_json)
-
-    # Load Model
-    leads_scored_df = els.model_score_leads(
-        data       = leads_df,
-        model_path = "models/pycaret/xgb_model_single_tuned_finalized"
-    )
+    media_type = get_media_type(request.headers.get("content-type"))
 
-    # Optimization Results
-    optimization_results = els.lead_score_strategy_optimization(
-       data = leads_scored_df,
+    # Parse + Score + Optimize (worker pool)
+    results = await run_in_worker_pool(
+        calculate_lead_strategy_job,
+        request_body,
+        media_type,
         monthly_sales_reduction_safe_guard = monthly_sales_reduction_safe_guard,
         #for_marketing_team: bool = True,
         email_list_size = email_list_size,
@@ -221,23 +890,127 @@ async def calculate_lead_strategy(
         avg_sales_emails_per_month = avg_sales_emails_per_month,
         customer_conversion_rate = customer_conversion_rate,
         avg_customer_value = avg_customer_value
-   )
-
-    # print(optimization_results)
-
-    # Results
-    results = {
-        'lead_strategy': optimization_results['lead_strategy_df'].to_json(),
-        'expected_value': optimization_results['expected_value'].to_json(),
-        'thresh_optim_table': optimization_results['thresh_optim_df'].data.to_json()
-        #'thresh_plot': optimization_results['tresh_plot']
-    }
+    )
 
     # Return
     return JSONResponse(results)
 
 
 
+# -------------------------------------------------------------------------------------- #
+#                       5.0 POST: STREAMING SCORES FOR LARGE LEAD FILES                  #
+# -------------------------------------------------------------------------------------- #
+# - Chunked upload of NDJSON (one lead per line) or CSV (header + one lead per line)
+# - Scored in STREAM_BATCH_ROWS batches as lines arrive, one batch in memory at a time
+# - Scored rows (row number, Score, id columns) are spooled (disk past STREAM_SPOOL_MAX_BYTES)
+#   and streamed back in the upload's format once the upload is read
+# - Batches wait for a free worker slot (no 503 halfway through an upload)
+# - CSV fields with embedded newlines are not supported (rows are split on newlines)
+NDJSON_MEDIA_TYPE      = "application/x-ndjson"
+CSV_MEDIA_TYPE         = "text/csv"
+STREAM_BATCH_ROWS      = int(os.environ.get("ELS_STREAM_BATCH_ROWS", 10000))
+STREAM_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+STREAM_ID_COLUMNS      = ["mailchimp_id", "user_email"]
+
+def score_stream_batch_job(lines, header, media_type, first_row):
+
+    text = "\n".join(lines)
+
+    if media_type == CSV_MEDIA_TYPE:
+        leads_df = pd.read_csv(io.StringIO(header + "\n" + text))
+    else:
+        leads_df = pd.read_json(io.StringIO(text), lines=True)
+
+    leads_scored_df = els.model_score_leads(
+        data       = leads_df,
+        model_path = MODEL_PATH
+    )
+
+    id_cols = [col for col in STREAM_ID_COLUMNS if col in leads_scored_df.columns]
+
+    scored_df = leads_scored_df[["Score"] + id_cols] \
+        .reset_index(drop=True) \
+        .assign(row=lambda x: x.index + first_row)
+
+    scored_df = scored_df[["row", "Score"] + id_cols]
+
+    if media_type == CSV_MEDIA_TYPE:
+        return scored_df.to_csv(header=(first_row == 0), index=False)
+
+    return scored_df.to_json(orient="records", lines=True).rstrip("\n") + "\n"
+
+
+def iter_spooled_file(spool, chunk_size=64 * 1024):
+
+    try:
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+@app.post("/predict_stream", dependencies=[Depends(get_api_key)])
+async def predict_stream(request: Request):
+
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    media_type = CSV_MEDIA_TYPE if content_type == CSV_MEDIA_TYPE else NDJSON_MEDIA_TYPE
+
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX_BYTES, mode="w+b")
+
+    header, lines, first_row = None, [], 0
+
+    async def score_lines(lines, first_row):
+        out = await wait_in_worker_pool(score_stream_batch_job, lines, header, media_type, first_row)
+        spool.write(out.encode("utf-8"))
+
+    # Closed by iter_spooled_file once streamed, here if the upload fails first
+    try:
+
+        # Read the upload as it arrives, score every STREAM_BATCH_ROWS lines
+        buffer = b""
+        async for chunk in request.stream():
+
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+
+            for line in complete:
+                line = line.decode("utf-8").rstrip("\r")
+                if not line.strip():
+                    continue
+                if media_type == CSV_MEDIA_TYPE and header is None:
+                    header = line
+                    continue
+                lines.append(line)
+
+                if len(lines) >= STREAM_BATCH_ROWS:
+                    await score_lines(lines, first_row)
+                    first_row += len(lines)
+                    lines = []
+
+        # Last line without a trailing newline
+        line = buffer.decode("utf-8").rstrip("\r")
+        if line.strip():
+            if media_type == CSV_MEDIA_TYPE and header is None:
+                header = line
+            else:
+                lines.append(line)
+
+        if lines:
+            await score_lines(lines, first_row)
+
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+
+    return StreamingResponse(iter_spooled_file(spool), media_type=media_type)
+
+
+
 # -------------------------------------------------------------------------------------- #
 #                                   DEFINE THE API PORT                                  #
 # -------------------------------------------------------------------------------------- #
@@ -11,6 +11,7 @@
 # -------------------------------------------------------------------------------------- #
 import pandas as pd
 import requests
+import json
 import email_lead_scoring as els
 
 # -------------------------------------------------------------------------------------- #
@@ -39,9 +40,32 @@ res = requests.get(
     headers = HEADERS
 )
 
-res.json()
+res.json().keys()
+
+pd.DataFrame(res.json()["data"])
+
+# Next page, selected columns, filters
+res = requests.get(
+    "http://127.0.0.1:8000/get_email_subscribers",
+    params = dict(
+        cursor            = res.json()["next_cursor"],
+        limit             = 500,
+        columns           = "mailchimp_id,user_email,member_rating,country_code",
+        country_code      = "US,IN",
+        min_member_rating = 3,
+        optin_start       = "2021-01-01"
+    ),
+    headers = HEADERS
+)
+
+pd.DataFrame(res.json()["data"])
+
+# Same page again (same url + params), unchanged -> 304, no body
+requests.get(
+    res.url,
+    headers = {**HEADERS, "If-None-Match": res.headers["ETag"]}
+).status_code
 
-pd.read_json(res.json())
 # -------------------------------------------------------------------------------------- #
 #                              2.0 POST: PASS DATA TO AN API                             #
 # -------------------------------------------------------------------------------------- #
@@ -66,6 +90,31 @@ res.json()
 
 pd.DataFrame(res.json())
 
+# Concurrent single-lead calls are micro-batched: they share model calls
+from concurrent.futures import ThreadPoolExecutor
+
+def predict_one_lead(i):
+    return requests.post(
+        url     = "http://127.0.0.1:8000/predict",
+        json    = full_data.iloc[[i]].to_json(),
+        headers = HEADERS
+    ).status_code
+
+stats_before = requests.get("http://127.0.0.1:8000/ready").json()
+
+with ThreadPoolExecutor(max_workers=32) as executor:
+    status_codes = list(executor.map(predict_one_lead, range(300)))
+
+stats_after = requests.get("http://127.0.0.1:8000/ready").json()
+
+n_batches  = stats_after["predict_batches"] - stats_before["predict_batches"]
+n_requests = stats_after["predict_requests"] - stats_before["predict_requests"]
+
+assert set(status_codes) == {200}
+assert n_requests == 300 and n_batches < n_requests
+
+n_requests / n_batches
+
 
 
 # -------------------------------------------------------------------------------------- #
@@ -93,3 +142,44 @@ res.json().keys()
 
 pd.read_json(res.json()['thresh_optim_df'])
 
+
+
+# -------------------------------------------------------------------------------------- #
+#                        5.0 POST: ARROW IPC / PARQUET PAYLOADS                          #
+# -------------------------------------------------------------------------------------- #
+#   NO JSON ROUND TRIPS: SEND ARROW, GET ARROW BACK
+import pyarrow as pa
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+table = pa.Table.from_pandas(full_data)
+sink = pa.BufferOutputStream()
+with pa.ipc.new_stream(sink, table.schema) as writer:
+    writer.write_table(table)
+
+res = requests.post(
+    url     = "http://127.0.0.1:8000/predict",
+    data    = sink.getvalue().to_pybytes(),
+    headers = {**HEADERS, "Content-Type": ARROW_MEDIA_TYPE, "Accept": ARROW_MEDIA_TYPE}
+)
+
+pa.ipc.open_stream(res.content).read_all().to_pandas()
+
+
+
+# -------------------------------------------------------------------------------------- #
+#                        6.0 POST: STREAM A LARGE LEAD FILE (NDJSON)                     #
+# -------------------------------------------------------------------------------------- #
+#   CHUNKED UPLOAD, SCORED ROWS STREAMED BACK
+def iter_ndjson(data, chunk_rows=10000):
+    for i in range(0, len(data), chunk_rows):
+        yield data.iloc[i:i + chunk_rows].to_json(orient="records", lines=True).rstrip("\n").encode() + b"\n"
+
+res = requests.post(
+    url     = "http://127.0.0.1:8000/predict_stream",
+    data    = iter_ndjson(full_data),
+    headers = {**HEADERS, "Content-Type": "application/x-ndjson"},
+    stream  = True
+)
+
+pd.DataFrame([json.loads(line) for line in res.iter_lines() if line])